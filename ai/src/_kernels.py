@@ -0,0 +1,80 @@
+"""
+Forecast Kernels
+
+Numba-compiled numeric kernels used by the forecast module.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, fastmath=True)
+def compute_forecast(sums, sumsqs, counts, mults, lookback_weeks):
+    """
+    Per-hour baseline, confidence and adjusted forecast from aggregated history
+
+    Args:
+        sums: float64 per-hour sum of demand values
+        sumsqs: float64 per-hour sum of squared demand values
+        counts: int64 per-hour number of observations
+        mults: float64 per-hour seasonal multipliers
+        lookback_weeks: Number of weeks used for the baseline
+
+    Returns:
+        (baseline, confidence, forecast) float32 arrays of the same length.
+        Per-hour mean/variance are computed in float64 scalars; only the
+        outputs (later rounded to 2 decimals) are narrowed.
+    """
+    n = sums.shape[0]
+    baseline = np.empty(n, dtype=np.float32)
+    confidence = np.empty(n, dtype=np.float32)
+    forecast = np.empty(n, dtype=np.float32)
+
+    total = 0
+    for h in range(n):
+        total += counts[h]
+
+    expected = lookback_weeks * 7.0
+
+    for h in range(n):
+        count = counts[h]
+
+        if total == 0:
+            # No historical data: default baseline with minimal confidence
+            base = 1.0
+            conf = 0.1
+        elif count == 0:
+            base = 0.1
+            conf = 0.1
+        else:
+            mean = sums[h] / count
+
+            # Sample standard deviation (ddof=1); zero for a single observation
+            std = 0.0
+            if count > 1:
+                variance = (sumsqs[h] - sums[h] * mean) / (count - 1)
+                if variance > 0.0:
+                    std = np.sqrt(variance)
+
+            # Weight the baseline by data quality
+            data_conf = min(count / expected, 1.0)
+            base = max(mean * data_conf, 0.1)
+
+            # Lower confidence for high variance relative to baseline
+            variance_conf = max(1.0 - (std / base) * 0.5, 0.1)
+            conf = min(data_conf * variance_conf, 1.0)
+
+        baseline[h] = base
+        confidence[h] = conf
+        forecast[h] = max(base * mults[h], 0.0)
+
+    return baseline, confidence, forecast
+
+
+def warm_up():
+    """Trigger JIT compilation (or load the on-disk cache) before the first request"""
+    mults = np.ones(24)
+    mults.flags.writeable = False  # cached multipliers are read-only arrays
+    compute_forecast(
+        np.zeros(24), np.zeros(24), np.zeros(24, dtype=np.int64), mults, 8
+    )
@@ -7,16 +7,69 @@ Implements baseline demand forecasting with multipliers from seasonal profiles.
 
 import asyncio
 import asyncpg
-import pandas as pd
 import numpy as np
-import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
+from collections import OrderedDict
 import logging
+import time
+
+from _kernels import compute_forecast
 
 logger = logging.getLogger(__name__)
 
+# Hot-path queries live at module level so each pooled connection reuses the
+# same prepared statement from asyncpg's statement cache on every request.
+DEMAND_HISTORY_SQL = """
+SELECT hour_of_day, demand_value::float8
+FROM demand_history 
+WHERE business_id = $1 
+  AND date >= $2 
+  AND date <= $3
+"""
+
+HOURLY_STATS_SQL = """
+SELECT hour_of_day,
+       SUM(demand_value)::float8 AS total,
+       SUM(demand_value * demand_value)::float8 AS total_sq,
+       COUNT(*) AS n
+FROM demand_history
+WHERE business_id = $1
+  AND date >= $2
+  AND date <= $3
+GROUP BY hour_of_day
+"""
+
+# Merges active profiles server-side: for every hour key the profile with the
+# lowest priority value wins. Keys/values that are not plain numbers are skipped
+# (CASE keeps the casts from running on them).
+ACTIVE_MULTIPLIERS_SQL = r"""
+SELECT DISTINCT ON (hour) hour, multiplier
+FROM (
+    SELECT 
+        CASE WHEN kv.key ~ '^\s*\+?[0-9]{1,9}\s*$' THEN kv.key::int END AS hour,
+        CASE WHEN kv.value ~ '^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$'
+             THEN kv.value::float8 END AS multiplier,
+        p.priority
+    FROM seasonal_profiles p
+    CROSS JOIN LATERAL jsonb_each_text(p.multiplier_data) kv
+    WHERE p.business_id = $1 
+      AND p.is_active = true
+      AND jsonb_typeof(p.multiplier_data) = 'object'
+) m
+WHERE hour BETWEEN 0 AND 23 AND multiplier IS NOT NULL
+ORDER BY hour, priority ASC
+"""
+
+# Seasonal profiles change rarely; cache merged multipliers per business
+MULTIPLIER_CACHE_TTL = 300.0  # seconds
+
+# Recently generated forecasts, keyed by (business_id, week, lookback_weeks)
+FORECAST_CACHE_SIZE = 1024
+FORECAST_CACHE_TTL = 300.0  # seconds
+
+
 @dataclass
 class ForecastInput:
     """Input parameters for demand forecasting"""
@@ -26,29 +79,38 @@ class ForecastInput:
     
 
 @dataclass
-class HourlyForecast:
-    """Single hourly forecast result"""
-    date: str
-    hour_of_day: int
-    forecasted_demand: float
-    confidence_score: float
-    baseline_value: float
-    applied_multiplier: float
+class ForecastArrays:
+    """Hourly forecast results for a week, one array entry per (date, hour) row"""
+    dates: np.ndarray  # object array of ISO date strings
+    hour_of_day: np.ndarray  # int8
+    forecasted_demand: np.ndarray
+    confidence_score: np.ndarray
+    baseline_value: np.ndarray
+    applied_multiplier: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.hour_of_day)
 
 
 class DemandForecaster:
     """Handles demand forecasting with baseline + multipliers"""
     
-    def __init__(self, db_url: str):
+    def __init__(self, db_url: str, pool_min_size: int = 2, pool_max_size: int = 20):
         self.db_url = db_url
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
         self.pool: Optional[asyncpg.Pool] = None
+        self._mult_cache: Dict[str, Tuple[float, np.ndarray]] = {}
+        self._result_cache: "OrderedDict[Tuple[str, str, int], Tuple[float, ForecastArrays]]" = OrderedDict()
     
     async def connect(self):
         """Initialize database connection pool"""
         self.pool = await asyncpg.create_pool(
             self.db_url,
-            min_size=1,
-            max_size=5
+            min_size=self.pool_min_size,
+            max_size=self.pool_max_size,
+            statement_cache_size=1024,
+            max_inactive_connection_lifetime=300
         )
     
     async def close(self):
@@ -61,193 +123,210 @@ class DemandForecaster:
         business_id: str, 
         start_date: datetime, 
         end_date: datetime
-    ) -> pd.DataFrame:
-        """Load demand history for the given business and date range"""
-        
-        query = """
-        SELECT date, hour_of_day, demand_value, demand_type
-        FROM demand_history 
-        WHERE business_id = $1 
-          AND date >= $2 
-          AND date <= $3
-        ORDER BY date, hour_of_day
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load demand history for the given business and date range
+        
+        Returns:
+            (hours, values) arrays with one entry per history row
         """
         
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query, business_id, start_date.date(), end_date.date())
+            rows = await conn.fetch(DEMAND_HISTORY_SQL, business_id, start_date.date(), end_date.date())
         
         if not rows:
             logger.warning(f"No demand history found for business {business_id}")
-            return pd.DataFrame()
         
-        # Convert to DataFrame
-        df = pd.DataFrame([dict(row) for row in rows])
-        df['datetime'] = pd.to_datetime(df['date']) + pd.to_timedelta(df['hour_of_day'], unit='h')
+        # Only the two aggregated columns are needed; read them positionally
+        count = len(rows)
+        hours = np.fromiter((row[0] for row in rows), np.int64, count=count)
+        values = np.fromiter((row[1] for row in rows), np.float64, count=count)
         
-        return df
+        return hours, values
     
-    async def load_active_multipliers(self, business_id: str) -> Dict[int, float]:
-        """Load active seasonal multipliers for the business"""
-        
-        query = """
-        SELECT multiplier_data
-        FROM seasonal_profiles 
-        WHERE business_id = $1 AND is_active = true
-        ORDER BY priority ASC
+    async def load_hourly_stats(
+        self,
+        business_id: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Aggregate demand history per hour of day inside PostgreSQL
+        
+        Returns:
+            (sums, sumsqs, counts) arrays of length 24, ready for compute_hourly_forecast
         """
         
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query, business_id)
+            rows = await conn.fetch(HOURLY_STATS_SQL, business_id, start_date.date(), end_date.date())
+        
+        sums = np.zeros(24)
+        sumsqs = np.zeros(24)
+        counts = np.zeros(24, dtype=np.int64)
         
-        # Combine multipliers by priority (lower priority = higher precedence)
-        combined_multipliers = {}
+        if not rows:
+            logger.warning(f"No demand history found for business {business_id}")
+            return sums, sumsqs, counts
         
         for row in rows:
-            multiplier_data = row['multiplier_data'] or {}
-            
-            # If multiplier_data is a string (JSON), parse it
-            if isinstance(multiplier_data, str):
-                try:
-                    multiplier_data = json.loads(multiplier_data)
-                except json.JSONDecodeError:
-                    multiplier_data = {}
+            hour = row['hour_of_day']
+            sums[hour] = row['total']
+            sumsqs[hour] = row['total_sq']
+            counts[hour] = row['n']
+        
+        return sums, sumsqs, counts
+    
+    async def load_active_multipliers(self, business_id: str) -> np.ndarray:
+        """
+        Load active seasonal multipliers for the business
+        
+        Results are cached per business for MULTIPLIER_CACHE_TTL seconds since
+        seasonal profiles change rarely; use invalidate_multipliers() after edits.
+        
+        Returns:
+            Read-only array of length 24 with the multiplier for each hour of day
+        """
+        
+        now = time.monotonic()
+        cached = self._mult_cache.get(business_id)
+        if cached and now - cached[0] < MULTIPLIER_CACHE_TTL:
+            return cached[1]
+        
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(ACTIVE_MULTIPLIERS_SQL, business_id)
+        
+        # Priority merge happens in SQL; at most 24 rows come back
+        multipliers = np.ones(24)  # missing hours default to 1.0 (no change)
+        for row in rows:
+            multipliers[row['hour']] = row['multiplier']
+        
+        multipliers.flags.writeable = False  # shared between requests via the cache
+        
+        self._mult_cache[business_id] = (now, multipliers)
+        return multipliers
+    
+    def invalidate_multipliers(self, business_id: Optional[str] = None):
+        """Drop cached multipliers for one business, or for all businesses"""
+        if business_id is None:
+            self._mult_cache.clear()
+        else:
+            self._mult_cache.pop(business_id, None)
+    
+    def invalidate_forecasts(self, business_id: Optional[str] = None):
+        """Drop in-process forecast results for one business, or for all businesses"""
+        if business_id is None:
+            self._result_cache.clear()
+            return
+        for key in [key for key in self._result_cache if key[0] == business_id]:
+            del self._result_cache[key]
+    
+    @staticmethod
+    def _hourly_stats(hours: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per-hour sum, sum of squares and count from one pass over the same arrays"""
+        sums = np.bincount(hours, weights=values, minlength=24)
+        sumsqs = np.bincount(hours, weights=values * values, minlength=24)
+        counts = np.bincount(hours, minlength=24)
+        return sums, sumsqs, counts
+    
+    def compute_hourly_forecast(
+        self,
+        sums: np.ndarray,
+        sumsqs: np.ndarray,
+        counts: np.ndarray,
+        multipliers: np.ndarray,
+        lookback_weeks: int = 8
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute baseline, confidence and adjusted forecast for each hour of day
+        
+        Args:
+            sums: Per-hour sum of demand values
+            sumsqs: Per-hour sum of squared demand values
+            counts: Per-hour number of observations
+            multipliers: Per-hour multipliers from seasonal profiles
+            lookback_weeks: Number of weeks used for the baseline
             
-            # Convert string keys to integers and merge
-            for hour_str, multiplier in multiplier_data.items():
-                try:
-                    hour = int(hour_str)
-                    if 0 <= hour <= 23:
-                        # First profile (highest priority) wins
-                        if hour not in combined_multipliers:
-                            combined_multipliers[hour] = float(multiplier)
-                except (ValueError, TypeError):
-                    continue
-        
-        # Fill missing hours with 1.0 (no change)
-        for hour in range(24):
-            if hour not in combined_multipliers:
-                combined_multipliers[hour] = 1.0
-        
-        return combined_multipliers
+        Returns:
+            (baseline, confidence, forecast) float32 arrays of length 24
+        """
+        
+        # The per-hour math runs in a Numba-compiled loop (see _kernels.py)
+        return compute_forecast(
+            np.asarray(sums, dtype=np.float64),
+            np.asarray(sumsqs, dtype=np.float64),
+            np.asarray(counts, dtype=np.int64),
+            np.asarray(multipliers, dtype=np.float64),
+            int(lookback_weeks)
+        )
     
-    def baseline_mavg(self, demand_df: pd.DataFrame, lookback_weeks: int = 8) -> Dict[int, float]:
+    @staticmethod
+    def _round2(values: np.ndarray) -> np.ndarray:
+        """Round kernel output to 2 decimals, widened so 12.34 stays 12.34 downstream"""
+        return np.round(values.astype(np.float64), 2)
+    
+    def baseline_mavg(
+        self,
+        history: Tuple[np.ndarray, np.ndarray],
+        lookback_weeks: int = 8
+    ) -> np.ndarray:
         """
         Compute baseline demand using moving average for each hour of day
         
         Args:
-            demand_df: DataFrame with demand history
+            history: (hours, values) arrays from load_demand_history
             lookback_weeks: Number of weeks to look back for baseline calculation
             
         Returns:
-            Dictionary mapping hour_of_day to baseline demand value
+            float32 array of length 24, indexed by hour_of_day
         """
         
-        if demand_df.empty:
-            # Return default baseline if no historical data
-            return {hour: 1.0 for hour in range(24)}
-        
-        # Group by hour_of_day and calculate mean demand
-        hourly_baseline = demand_df.groupby('hour_of_day')['demand_value'].agg([
-            'mean',
-            'std',
-            'count'
-        ]).to_dict('index')
-        
-        baseline_values = {}
-        
-        for hour in range(24):
-            if hour in hourly_baseline:
-                stats = hourly_baseline[hour]
-                mean_demand = stats['mean']
-                count = stats['count']
-                
-                # Weight the baseline by data quality
-                confidence_weight = min(count / (lookback_weeks * 7), 1.0)
-                baseline_values[hour] = max(mean_demand * confidence_weight, 0.1)
-            else:
-                # No data for this hour, use minimal baseline
-                baseline_values[hour] = 0.1
-        
-        return baseline_values
+        baseline, _, _ = self.compute_hourly_forecast(
+            *self._hourly_stats(*history), np.ones(24), lookback_weeks
+        )
+        return baseline
     
-    def apply_multipliers(
-        self, 
-        baseline: Dict[int, float], 
-        multipliers: Dict[int, float]
-    ) -> Dict[int, float]:
+    def apply_multipliers(self, baseline: np.ndarray, multipliers: np.ndarray) -> np.ndarray:
         """
         Apply seasonal multipliers to baseline values
         
         Args:
-            baseline: Hourly baseline demand values
-            multipliers: Hourly multiplier values from seasonal profiles
+            baseline: Hourly baseline demand values (length 24)
+            multipliers: Hourly multiplier values from seasonal profiles (length 24)
             
         Returns:
-            Dictionary mapping hour_of_day to adjusted demand forecast
+            Array of length 24 with the adjusted demand forecast per hour
         """
         
-        adjusted_forecast = {}
-        
-        for hour in range(24):
-            base_value = baseline.get(hour, 0.1)
-            multiplier = multipliers.get(hour, 1.0)
-            
-            # Apply multiplier with bounds checking
-            adjusted_value = base_value * multiplier
-            adjusted_forecast[hour] = max(adjusted_value, 0.0)
-        
-        return adjusted_forecast
+        return np.clip(baseline * multipliers, 0.0, None)
     
     def calculate_confidence(
         self, 
-        demand_df: pd.DataFrame, 
-        baseline: Dict[int, float],
+        history: Tuple[np.ndarray, np.ndarray],
+        baseline: np.ndarray,
         lookback_weeks: int = 8
-    ) -> Dict[int, float]:
-        """Calculate confidence score for each hour based on data quality"""
-        
-        confidence_scores = {}
-        
-        if demand_df.empty:
-            return {hour: 0.1 for hour in range(24)}
-        
-        # Calculate variance and data availability for each hour
-        hourly_stats = demand_df.groupby('hour_of_day')['demand_value'].agg([
-            'std',
-            'count'
-        ]).to_dict('index')
-        
-        for hour in range(24):
-            if hour in hourly_stats:
-                stats = hourly_stats[hour]
-                count = stats['count']
-                std = stats.get('std', 0) or 0
-                base_value = baseline.get(hour, 1.0)
-                
-                # Confidence based on data availability and consistency
-                data_confidence = min(count / (lookback_weeks * 7), 1.0)
-                
-                # Lower confidence for high variance relative to baseline
-                if base_value > 0:
-                    cv = std / base_value  # Coefficient of variation
-                    variance_confidence = max(1.0 - (cv * 0.5), 0.1)
-                else:
-                    variance_confidence = 0.1
-                
-                confidence_scores[hour] = min(data_confidence * variance_confidence, 1.0)
-            else:
-                confidence_scores[hour] = 0.1
-        
-        return confidence_scores
+    ) -> np.ndarray:
+        """
+        Calculate confidence score for each hour based on data quality
+        
+        The baseline is derived from history by the same pass; the argument is
+        kept for backward compatibility.
+        
+        Returns:
+            float32 array of length 24, indexed by hour_of_day
+        """
+        
+        _, confidence, _ = self.compute_hourly_forecast(
+            *self._hourly_stats(*history), np.ones(24), lookback_weeks
+        )
+        return confidence
     
     def week_to_dates(self, week_str: str) -> Tuple[datetime, datetime]:
         """Convert YYYY-WW format to start/end dates"""
         try:
             year, week = map(int, week_str.split('-'))
             
-            # Calculate first day of the week (Monday)
-            jan_4 = datetime(year, 1, 4)
-            week_start = jan_4 + timedelta(days=(week - 1) * 7 - jan_4.weekday())
+            # First day of the ISO week (Monday); rejects week 53 in 52-week years
+            week_start = datetime.fromisocalendar(year, week, 1)
             week_end = week_start + timedelta(days=6)
             
             return week_start, week_end
@@ -255,17 +334,44 @@ class DemandForecaster:
         except (ValueError, AttributeError) as e:
             raise ValueError(f"Invalid week format '{week_str}'. Expected YYYY-WW") from e
     
-    async def generate_forecast(self, forecast_input: ForecastInput) -> List[HourlyForecast]:
+    async def generate_forecast(self, forecast_input: ForecastInput) -> ForecastArrays:
         """
         Generate hourly demand forecast for the target week
         
+        Results are kept in an LRU cache for FORECAST_CACHE_TTL seconds, so repeated
+        requests for the same business/week/lookback skip the database entirely.
+        
         Args:
             forecast_input: Forecast parameters
             
         Returns:
-            List of hourly forecasts for the target week
+            Hourly forecasts for the target week, ordered by date then hour
+            (read-only arrays, shared between requests)
         """
         
+        key = (
+            forecast_input.business_id,
+            forecast_input.target_week,
+            forecast_input.lookback_weeks
+        )
+        now = time.monotonic()
+        cached = self._result_cache.get(key)
+        if cached and now - cached[0] < FORECAST_CACHE_TTL:
+            self._result_cache.move_to_end(key)
+            return cached[1]
+        
+        forecasts = await self._build_forecast(forecast_input)
+        
+        self._result_cache[key] = (now, forecasts)
+        self._result_cache.move_to_end(key)
+        if len(self._result_cache) > FORECAST_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        
+        return forecasts
+    
+    async def _build_forecast(self, forecast_input: ForecastInput) -> ForecastArrays:
+        """Load history and multipliers and compute the week's hourly forecast"""
+        
         target_start, target_end = self.week_to_dates(forecast_input.target_week)
         
         # Calculate lookback period
@@ -278,43 +384,34 @@ class DemandForecaster:
             f"using data from {lookback_start.date()} to {lookback_end.date()}"
         )
         
-        # Load historical demand data
-        demand_df = await self.load_demand_history(
-            forecast_input.business_id,
-            lookback_start,
-            lookback_end
+        # Load per-hour demand aggregates and active multipliers concurrently
+        # (independent queries on separate pool connections)
+        hourly_stats, multipliers = await asyncio.gather(
+            self.load_hourly_stats(
+                forecast_input.business_id,
+                lookback_start,
+                lookback_end
+            ),
+            self.load_active_multipliers(forecast_input.business_id)
         )
         
-        # Load active multipliers
-        multipliers = await self.load_active_multipliers(forecast_input.business_id)
-        
-        # Calculate baseline using moving average
-        baseline = self.baseline_mavg(demand_df, forecast_input.lookback_weeks)
+        # Baseline, confidence and multiplier-adjusted forecast in one pass
+        baseline, confidence_scores, forecast_values = self.compute_hourly_forecast(
+            *hourly_stats, multipliers, forecast_input.lookback_weeks
+        )
         
-        # Apply multipliers to get final forecast
-        forecast_values = self.apply_multipliers(baseline, multipliers)
+        # Round once per hour, then expand across the 7 days of the target week
+        dates = [(target_start.date() + timedelta(days=i)).isoformat() for i in range(7)]
         
-        # Calculate confidence scores
-        confidence_scores = self.calculate_confidence(
-            demand_df, baseline, forecast_input.lookback_weeks
+        forecasts = ForecastArrays(
+            dates=np.repeat(np.array(dates, dtype=object), 24),
+            hour_of_day=np.tile(np.arange(24, dtype=np.int8), 7),
+            forecasted_demand=np.tile(self._round2(forecast_values), 7),
+            confidence_score=np.tile(self._round2(confidence_scores), 7),
+            baseline_value=np.tile(self._round2(baseline), 7),
+            applied_multiplier=np.tile(multipliers, 7)
         )
-        
-        # Generate forecasts for each hour of the target week
-        forecasts = []
-        current_date = target_start.date()
-        
-        while current_date <= target_end.date():
-            for hour in range(24):
-                forecast = HourlyForecast(
-                    date=current_date.isoformat(),
-                    hour_of_day=hour,
-                    forecasted_demand=round(forecast_values[hour], 2),
-                    confidence_score=round(confidence_scores[hour], 2),
-                    baseline_value=round(baseline[hour], 2),
-                    applied_multiplier=multipliers[hour]
-                )
-                forecasts.append(forecast)
-            
-            current_date += timedelta(days=1)
+        for column in vars(forecasts).values():
+            column.flags.writeable = False  # shared between requests via the cache
         
         return forecasts
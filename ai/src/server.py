@@ -6,17 +6,19 @@ FastAPI server for AI forecasting endpoints.
 """
 
 import os
-import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional
 import asyncio
 
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field, field_validator
 import asyncpg
 
-from forecast import DemandForecaster, ForecastInput, HourlyForecast
+from forecast import DemandForecaster, ForecastInput, ForecastArrays
+import _kernels
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,9 +28,14 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="ShiftMind AI Service",
     description="AI-powered demand forecasting and optimization",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
+# Forecast details are large, very repetitive JSON; the API's httpx client
+# already sends Accept-Encoding: gzip and decodes transparently
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Database configuration
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "54322")
@@ -38,6 +45,36 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "postgres")
 
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Connection pool sizing (each /forecast/generate uses two connections concurrently)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+
+# save_forecast_to_cache streams rows into a per-transaction staging table with
+# COPY, then merges them into forecast_cache with a single upsert statement
+FORECAST_CACHE_COLUMNS = (
+    "business_id", "cache_key", "forecast_date", "hour_of_day", "forecasted_demand",
+    "confidence_score", "model_version", "parameters_used", "expires_at"
+)
+
+FORECAST_CACHE_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS forecast_cache_staging 
+(LIKE forecast_cache INCLUDING DEFAULTS) 
+ON COMMIT DELETE ROWS
+"""
+
+FORECAST_CACHE_MERGE_SQL = f"""
+INSERT INTO forecast_cache ({", ".join(FORECAST_CACHE_COLUMNS)})
+SELECT {", ".join(FORECAST_CACHE_COLUMNS)} FROM forecast_cache_staging
+ON CONFLICT (business_id, cache_key, forecast_date, hour_of_day) 
+DO UPDATE SET
+    forecasted_demand = EXCLUDED.forecasted_demand,
+    confidence_score = EXCLUDED.confidence_score,
+    model_version = EXCLUDED.model_version,
+    parameters_used = EXCLUDED.parameters_used,
+    expires_at = EXCLUDED.expires_at,
+    updated_at = NOW()
+"""
+
 # Global forecaster instance
 forecaster: Optional[DemandForecaster] = None
 
@@ -47,6 +84,19 @@ class ForecastRequest(BaseModel):
     business_id: str = Field(..., description="Business UUID")
     week: str = Field(..., pattern=r"^\d{4}-\d{2}$", description="Target week in YYYY-WW format")
     lookback_weeks: Optional[int] = Field(8, ge=1, le=52, description="Number of weeks to look back")
+    
+    @field_validator("week")
+    @classmethod
+    def check_week_range(cls, value: str) -> str:
+        """Year/week range check; the pattern above already guarantees YYYY-WW digits"""
+        year, week = int(value[:4]), int(value[5:])
+        if not 2020 <= year <= 2030:
+            raise ValueError(f"Invalid week '{value}'. Expected YYYY-WW")
+        try:
+            date.fromisocalendar(year, week, 1)  # also rejects week 53 in 52-week years
+        except ValueError:
+            raise ValueError(f"Invalid week '{value}'. Expected YYYY-WW") from None
+        return value
 
 
 class ForecastResponse(BaseModel):
@@ -77,10 +127,14 @@ async def startup_event():
     logger.info(f"Connecting to database: {DB_HOST}:{DB_PORT}/{DB_NAME}")
     
     try:
-        forecaster = DemandForecaster(DATABASE_URL)
+        forecaster = DemandForecaster(DATABASE_URL, DB_POOL_MIN, DB_POOL_MAX)
         await forecaster.connect()
         logger.info("Database connection established")
         
+        # Compile the forecast kernel now so the first request doesn't pay for it
+        _kernels.warm_up()
+        logger.info("Forecast kernels ready")
+        
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         raise
@@ -99,23 +153,6 @@ async def shutdown_event():
 
 
 # Helper functions
-def validate_week_format(week_str: str) -> bool:
-    """Validate week format and check if it's reasonable"""
-    try:
-        year, week = map(int, week_str.split('-'))
-        
-        # Basic validation
-        if year < 2020 or year > 2030:
-            return False
-        if week < 1 or week > 53:
-            return False
-            
-        return True
-        
-    except (ValueError, AttributeError):
-        return False
-
-
 def generate_cache_key(business_id: str, week: str, lookback_weeks: int) -> str:
     """Generate cache key for forecast results"""
     return f"forecast_{business_id}_{week}_lb{lookback_weeks}"
@@ -124,7 +161,7 @@ def generate_cache_key(business_id: str, week: str, lookback_weeks: int) -> str:
 async def save_forecast_to_cache(
     business_id: str,
     cache_key: str,
-    forecasts: List[HourlyForecast],
+    forecasts: ForecastArrays,
     expires_hours: int = 24
 ) -> int:
     """Save forecast results to database cache"""
@@ -135,53 +172,46 @@ async def save_forecast_to_cache(
     # Calculate expiry time
     expires_at = datetime.now() + timedelta(hours=expires_hours)
     
-    # Prepare batch insert
-    insert_query = """
-    INSERT INTO forecast_cache 
-    (business_id, cache_key, forecast_date, hour_of_day, forecasted_demand, 
-     confidence_score, model_version, parameters_used, expires_at)
-    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-    ON CONFLICT (business_id, cache_key, forecast_date, hour_of_day) 
-    DO UPDATE SET
-        forecasted_demand = EXCLUDED.forecasted_demand,
-        confidence_score = EXCLUDED.confidence_score,
-        model_version = EXCLUDED.model_version,
-        parameters_used = EXCLUDED.parameters_used,
-        expires_at = EXCLUDED.expires_at,
-        updated_at = NOW()
-    """
+    # Forecast dates are ISO strings shared by 24 rows each; parse each once
+    dates = forecasts.dates.tolist()
+    date_objs = {d: datetime.strptime(d, "%Y-%m-%d").date() for d in set(dates)}
+    model_version = "baseline_v1.0"
     
-    # Prepare data for batch insert
-    insert_data = []
-    for forecast in forecasts:
-        parameters_used = json.dumps({
-            "baseline_value": forecast.baseline_value,
-            "applied_multiplier": forecast.applied_multiplier
-        })
-        
-        # Convert date to proper date object for database
-        if isinstance(forecast.date, str):
-            date_obj = datetime.strptime(forecast.date, "%Y-%m-%d").date()
-        elif hasattr(forecast.date, 'date'):
-            date_obj = forecast.date.date()
-        else:
-            date_obj = forecast.date
-            
-        insert_data.append((
+    # Prepare data for batch insert; parameters_used is always the same two
+    # float fields, so format the JSON directly instead of json.dumps per row
+    insert_data = [
+        (
             business_id,
             cache_key,
-            date_obj,
-            forecast.hour_of_day,
-            forecast.forecasted_demand,
-            forecast.confidence_score,
-            "baseline_v1.0",
-            parameters_used,
+            date_objs[day],
+            hour,
+            demand,
+            confidence,
+            model_version,
+            f'{{"baseline_value":{baseline!r},"applied_multiplier":{multiplier!r}}}',
             expires_at
-        ))
+        )
+        for day, hour, demand, confidence, baseline, multiplier in zip(
+            dates,
+            forecasts.hour_of_day.tolist(),
+            forecasts.forecasted_demand.tolist(),
+            forecasts.confidence_score.tolist(),
+            forecasts.baseline_value.tolist(),
+            forecasts.applied_multiplier.tolist()
+        )
+    ]
     
-    # Execute batch insert
+    # COPY into the staging table (one binary stream), then upsert in one statement.
+    # The staging table survives on the pooled connection and is emptied on commit.
     async with forecaster.pool.acquire() as conn:
-        await conn.executemany(insert_query, insert_data)
+        async with conn.transaction():
+            await conn.execute(FORECAST_CACHE_STAGING_SQL)
+            await conn.copy_records_to_table(
+                "forecast_cache_staging",
+                records=insert_data,
+                columns=FORECAST_CACHE_COLUMNS
+            )
+            await conn.execute(FORECAST_CACHE_MERGE_SQL)
     
     return len(insert_data)
 
@@ -214,13 +244,6 @@ async def generate_forecast(
     5. Returns summary
     """
     
-    # Validate inputs
-    if not validate_week_format(request.week):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid week format '{request.week}'. Expected YYYY-WW"
-        )
-    
     if not forecaster:
         raise HTTPException(
             status_code=500,
@@ -239,15 +262,15 @@ async def generate_forecast(
         logger.info(f"Starting forecast generation for {request.business_id}, week {request.week}")
         forecasts = await forecaster.generate_forecast(forecast_input)
         
-        if not forecasts:
+        if len(forecasts) == 0:
             raise HTTPException(
                 status_code=400,
                 detail="Could not generate forecasts - insufficient data or invalid parameters"
             )
         
         # Calculate summary statistics
-        total_demand = sum(f.forecasted_demand for f in forecasts)
-        avg_confidence = sum(f.confidence_score for f in forecasts) / len(forecasts)
+        total_demand = float(forecasts.forecasted_demand.sum())
+        avg_confidence = float(forecasts.confidence_score.mean())
         
         # Generate cache key
         cache_key = generate_cache_key(
@@ -264,22 +287,9 @@ async def generate_forecast(
             forecasts
         )
         
-        # Calculate daily summaries
-        daily_summary = {}
-        current_date = None
-        daily_total = 0
-        
-        for forecast in forecasts:
-            if current_date != forecast.date:
-                if current_date is not None:
-                    daily_summary[current_date] = round(daily_total, 2)
-                current_date = forecast.date
-                daily_total = 0
-            daily_total += forecast.forecasted_demand
-        
-        # Add last day
-        if current_date is not None:
-            daily_summary[current_date] = round(daily_total, 2)
+        # Calculate daily summaries (rows are ordered day by day, 24 hours each)
+        daily_totals = forecasts.forecasted_demand.reshape(-1, 24).sum(axis=1).round(2)
+        daily_summary = dict(zip(forecasts.dates[::24].tolist(), daily_totals.tolist()))
         
         # Prepare response
         response = ForecastResponse(
@@ -401,6 +411,7 @@ async def delete_forecast_cache(
     try:
         async with forecaster.pool.acquire() as conn:
             result = await conn.execute(delete_query, business_id, cache_key)
+        forecaster.invalidate_forecasts(business_id)
         
         # Extract number of deleted rows from result
         deleted_count = int(result.split()[-1]) if result else 0
@@ -426,6 +437,41 @@ async def delete_forecast_cache(
         )
 
 
+@app.delete("/forecast/cache")
+async def clear_forecast_cache(
+    business_id: str = Query(..., description="Business UUID for security")
+) -> Dict[str, str]:
+    """Delete all cached forecasts of a business (database and in-process)"""
+    
+    if not forecaster or not forecaster.pool:
+        raise HTTPException(status_code=500, detail="Database not connected")
+    
+    delete_query = """
+    DELETE FROM forecast_cache 
+    WHERE business_id = $1
+    """
+    
+    try:
+        async with forecaster.pool.acquire() as conn:
+            result = await conn.execute(delete_query, business_id)
+        forecaster.invalidate_forecasts(business_id)
+        forecaster.invalidate_multipliers(business_id)
+        
+        deleted_count = int(result.split()[-1]) if result else 0
+        
+        return {
+            "message": f"Deleted {deleted_count} forecast records",
+            "business_id": business_id
+        }
+        
+    except Exception as e:
+        logger.error(f"Error clearing forecast cache: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
 if __name__ == "__main__":
     import uvicorn
     
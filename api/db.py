@@ -2,35 +2,213 @@ import asyncpg
 import asyncio
 import os
 from typing import Optional
+from contextlib import asynccontextmanager
+from time import monotonic
+from dataclasses import dataclass
 import logging
 
+import orjson
+from fastapi import HTTPException
+
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True, slots=True)
+class DBConfig:
+    """Connection settings, read from the environment once at import"""
+    host: str
+    port: int
+    user: str
+    password: str
+    database: str
+    pool_min: int
+    pool_max: int
+    command_timeout: float
+
+
+# create_pool opens pool_min connections up front, so the first requests don't
+# pay connection setup. Callers beyond DB_CONCURRENCY wait for a slot, and
+# get_db_slot rejects new requests with 503 once DB_MAX_WAITING callers are
+# already waiting.
+CFG = DBConfig(
+    host=os.getenv("POSTGRES_HOST", "localhost"),
+    port=int(os.getenv("POSTGRES_PORT", "5431")),
+    user=os.getenv("POSTGRES_USER", "postgres"),
+    password=os.getenv("POSTGRES_PASSWORD", "postgres"),
+    database=os.getenv("POSTGRES_DB", "postgres"),
+    pool_min=int(os.getenv("POSTGRES_POOL_MIN", "10")),
+    pool_max=int(os.getenv("POSTGRES_POOL_MAX", "20")),
+    command_timeout=float(os.getenv("POSTGRES_COMMAND_TIMEOUT", "5"))
+)
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", str(CFG.pool_max)))
+DB_MAX_WAITING = int(os.getenv("DB_MAX_WAITING", "100"))
+
+# Employee lists are cached per business for this many seconds; employee writes
+# through this module drop the cache
+EMPLOYEES_CACHE_TTL = float(os.getenv("EMPLOYEES_CACHE_TTL", "60"))
+
+# Sent in the startup packet of every pooled connection, so they survive the
+# RESET ALL asyncpg runs when a connection is released back to the pool. JIT
+# compilation only adds latency variance to the short indexed lookups this
+# service runs, and a pinned generic plan avoids Postgres re-planning them per
+# business_id after the first executions.
+SERVER_SETTINGS = {
+    "jit": "off",
+    "plan_cache_mode": "force_generic_plan",
+    "application_name": "shiftmind-api",
+    "search_path": "public",
+}
+
+# Hot read queries. Kept as module constants so every pooled connection reuses
+# the same server-side prepared statement from asyncpg's statement cache.
+EMPLOYEES_SQL = """
+SELECT id, first_name, last_name, email, hourly_rate 
+FROM employees 
+WHERE business_id = $1
+ORDER BY first_name, last_name
+"""
+
+# Column order of EMPLOYEES_SQL; rows are zipped positionally instead of by key
+_EMP_COLS = ("id", "first_name", "last_name", "email", "hourly_rate")
+
+# Businesses + one business's employees in a single round trip; `kind`
+# discriminates the rows ('b' sorts before 'e')
+BOOTSTRAP_SQL = """
+SELECT 'b' AS kind, id, name AS first_name, NULL::text AS last_name,
+       NULL::text AS email, NULL::numeric AS hourly_rate
+FROM businesses
+UNION ALL
+SELECT 'e', id, first_name, last_name, email, hourly_rate
+FROM employees
+WHERE business_id = $1
+ORDER BY 1, 3, 4
+"""
+
+EMPLOYEE_INSERT_SQL = """
+INSERT INTO employees (business_id, first_name, last_name, email, hourly_rate)
+VALUES ($1, $2, $3, $4, $5)
+RETURNING id, first_name, last_name, email, hourly_rate
+"""
+
+# Fixed statement (one prepared plan); NULL keeps the current value.
+# updated_at is set by the update_employees_updated_at trigger.
+EMPLOYEE_UPDATE_SQL = """
+UPDATE employees
+SET first_name = COALESCE($3, first_name),
+    last_name = COALESCE($4, last_name),
+    email = COALESCE($5, email),
+    hourly_rate = COALESCE($6, hourly_rate)
+WHERE id = $1 AND business_id = $2
+RETURNING id, first_name, last_name, email, hourly_rate
+"""
+
+EMPLOYEE_DELETE_SQL = "DELETE FROM employees WHERE id = $1 AND business_id = $2"
+
+# Bulk employee import: small batches go through executemany, larger ones are
+# COPY'd into a temp staging table (plain text/float8 columns, so COPY's binary
+# encoders are available) and inserted in one statement. id and timestamps come
+# from the table defaults.
+EMPLOYEES_BULK_COPY_THRESHOLD = 1000
+
+EMPLOYEES_BULK_INSERT_SQL = """
+INSERT INTO employees (business_id, first_name, last_name, email, hourly_rate)
+VALUES ($1, $2, $3, $4, $5)
+"""
+
+EMPLOYEES_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS employees_import (
+    first_name TEXT, last_name TEXT, email TEXT, hourly_rate FLOAT8
+) ON COMMIT DELETE ROWS
+"""
+
+EMPLOYEES_MERGE_SQL = """
+INSERT INTO employees (business_id, first_name, last_name, email, hourly_rate)
+SELECT $1, first_name, last_name, email, hourly_rate::numeric FROM employees_import
+"""
+
+class DatabaseUnavailable(Exception):
+    """Raised when the pool couldn't be created (the API starts without a DB)"""
+
+
+def _jsonb_encode(value) -> str:
+    return orjson.dumps(value).decode()
+
+
+async def _init_connection(conn):
+    """Decode uuid as str, numeric as float and jsonb via orjson, so rows are JSON-ready without per-row conversion"""
+    await conn.set_type_codec(
+        'uuid', encoder=str, decoder=str, schema='pg_catalog', format='text'
+    )
+    await conn.set_type_codec(
+        'numeric', encoder=str, decoder=float, schema='pg_catalog', format='text'
+    )
+    # jsonb columns come back as dicts/lists and accept them as parameters
+    await conn.set_type_codec(
+        'jsonb', encoder=_jsonb_encode, decoder=orjson.loads, schema='pg_catalog', format='text'
+    )
+
 class Database:
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        self._gate = asyncio.Semaphore(DB_CONCURRENCY)
+        self._waiting = 0
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._employees_cache: dict[str, tuple] = {}  # business_id -> (expires_at, rows)
+        self._employees_version = 0
+    
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the DB_CONCURRENCY slots for the duration of a DB operation"""
+        self._waiting += 1
+        try:
+            await self._gate.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            yield
+        finally:
+            self._gate.release()
+    
+    async def coalesce(self, key: str, factory):
+        """
+        Single-flight: concurrent callers with the same key share one factory() call.
+        
+        The shared task is shielded, so a caller that gets cancelled doesn't
+        cancel the query for everyone else waiting on it.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+    
+    def overloaded(self) -> bool:
+        """True when every slot is busy and the wait queue is already full"""
+        return self._gate.locked() and self._waiting >= DB_MAX_WAITING
     
     async def connect(self):
         """Create database connection pool"""
         max_retries = 5
         retry_delay = 2
         
-        # Debug environment variables
-        db_name = os.getenv("POSTGRES_DB", "postgres")
-        print(f"Connecting to database: {db_name}")
-        print(f"Host: {os.getenv('POSTGRES_HOST', 'localhost')}")
-        print(f"Port: {os.getenv('POSTGRES_PORT', '5431')}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Connecting to database %s at %s:%s", CFG.database, CFG.host, CFG.port)
         
         for attempt in range(max_retries):
             try:
                 self.pool = await asyncpg.create_pool(
-                    host=os.getenv("POSTGRES_HOST", "localhost"),
-                    port=int(os.getenv("POSTGRES_PORT", "5431")),
-                    user=os.getenv("POSTGRES_USER", "postgres"),
-                    password=os.getenv("POSTGRES_PASSWORD", "postgres"),
-                    database=db_name,
-                    min_size=1,
-                    max_size=10
+                    host=CFG.host,
+                    port=CFG.port,
+                    user=CFG.user,
+                    password=CFG.password,
+                    database=CFG.database,
+                    min_size=CFG.pool_min,
+                    max_size=CFG.pool_max,
+                    max_inactive_connection_lifetime=300,
+                    command_timeout=CFG.command_timeout,
+                    statement_cache_size=1024,
+                    server_settings=SERVER_SETTINGS,
+                    init=_init_connection
                 )
                 logger.info("Database connection pool created successfully")
                 return
@@ -49,103 +227,194 @@ class Database:
             await self.pool.close()
             logger.info("Database connection pool closed")
     
-    async def get_businesses(self):
-        """Get all businesses - return id and name only"""
+    async def get_employees(self, business_id: str):
+        """Get employees for a business - return short list (asyncpg Records, see RecordJSONResponse)"""
         if not self.pool:
-            raise Exception("Database connection not available")
+            raise DatabaseUnavailable("Database connection not available")
+            
+        cached = self._employees_cache.get(business_id)
+        if cached and cached[0] > monotonic():
+            return cached[1]
         
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                "SELECT id::text as id, name FROM businesses ORDER BY name"
-            )
-            return [{"id": str(row["id"]), "name": row["name"]} for row in rows]
+        version = self._employees_version
+        rows = await self.coalesce(
+            f"employees:{version}:{business_id}", lambda: self._fetch_employees(business_id)
+        )
+        # Don't cache a result that raced with an employee write
+        if version == self._employees_version:
+            self._employees_cache[business_id] = (monotonic() + EMPLOYEES_CACHE_TTL, rows)
+        return rows
     
-    async def get_employees(self, business_id: str):
-        """Get employees for a business - return short list"""
+    async def _fetch_employees(self, business_id: str):
+        async with self._slot(), self.pool.acquire() as conn:
+            return await conn.fetch(EMPLOYEES_SQL, business_id)
+    
+    def invalidate_employees(self):
+        """Drop cached employee lists; call after any employee write"""
+        self._employees_version += 1
+        self._employees_cache.clear()
+    
+    @asynccontextmanager
+    async def _employees_write(self):
+        """Invalidate before and after the write, so a read racing it isn't cached"""
+        self.invalidate_employees()
+        try:
+            yield
+        finally:
+            self.invalidate_employees()
+
+    async def get_bootstrap(self, business_id: str):
+        """Get all businesses (id, name) and the employees of one business in one query"""
         if not self.pool:
-            raise Exception("Database connection not available")
-            
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                """
-                SELECT id::text as id, first_name, last_name, email, hourly_rate 
-                FROM employees 
-                WHERE business_id = $1
-                ORDER BY first_name, last_name
-                """,
-                business_id
-            )
-            return [
-                {
-                    "id": str(row["id"]),
-                    "first_name": row["first_name"],
-                    "last_name": row["last_name"],
-                    "email": row["email"],
-                    "hourly_rate": float(row["hourly_rate"]) if row["hourly_rate"] else None
-                }
-                for row in rows
-            ]
-
-    async def create_employee(self, business_id: str, employee_data: dict):
+            raise DatabaseUnavailable("Database connection not available")
+        
+        async with self._slot(), self.pool.acquire() as conn:
+            rows = await conn.fetch(BOOTSTRAP_SQL, business_id)
+        
+        businesses, employees = [], []
+        for row in rows:
+            if row[0] == 'b':
+                businesses.append({"id": row[1], "name": row[2]})
+            else:
+                employees.append(dict(zip(_EMP_COLS, row[1:])))
+        return {"businesses": businesses, "employees": employees}
+
+    async def stream_employees(self, business_id: str, prefetch: int = 1000):
+        """Stream employees of a business as NDJSON lines via a server-side cursor"""
+        if not self.pool:
+            raise DatabaseUnavailable("Database connection not available")
+        
+        async with self._slot(), self.pool.acquire() as conn:
+            # Cursors only live inside a transaction
+            async with conn.transaction():
+                async for row in conn.cursor(EMPLOYEES_SQL, business_id, prefetch=prefetch):
+                    yield orjson.dumps(dict(zip(_EMP_COLS, row))) + b"\n"
+
+    async def create_employee(self, business_id: str, first_name: str, last_name: str,
+                              email: str, hourly_rate: float):
         """Create a new employee"""
         if not self.pool:
-            raise Exception("Database connection not available")
+            raise DatabaseUnavailable("Database connection not available")
             
-        employee_id = str(__import__('uuid').uuid4())
-        
-        async with self.pool.acquire() as conn:
-            query = """
-                INSERT INTO employees (id, business_id, first_name, last_name, email, hourly_rate, created_at, updated_at)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                RETURNING id, first_name, last_name, email, hourly_rate
-            """
-            now = __import__('datetime').datetime.utcnow()
+        # id and created_at/updated_at come from the employees table defaults
+        async with self._slot(), self._employees_write(), self.pool.acquire() as conn:
             row = await conn.fetchrow(
-                query, 
-                employee_id, 
-                business_id,
-                employee_data['first_name'],
-                employee_data['last_name'],
-                employee_data['email'],
-                employee_data['hourly_rate'],
-                now,
-                now
+                EMPLOYEE_INSERT_SQL, business_id, first_name, last_name, email, hourly_rate
             )
             
             if row:
-                return {
-                    "id": str(row["id"]),
-                    "first_name": row["first_name"],
-                    "last_name": row["last_name"],
-                    "email": row["email"],
-                    "hourly_rate": float(row["hourly_rate"])
-                }
+                return dict(row)
             else:
                 raise Exception("Failed to create employee")
 
+    async def update_employee(self, employee_id: str, business_id: str, first_name: Optional[str],
+                              last_name: Optional[str], email: Optional[str],
+                              hourly_rate: Optional[float]):
+        """Update an employee of a business; returns the updated row, or None if not found"""
+        if not self.pool:
+            raise DatabaseUnavailable("Database connection not available")
+        
+        async with self._slot(), self._employees_write(), self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                EMPLOYEE_UPDATE_SQL, employee_id, business_id,
+                first_name, last_name, email, hourly_rate
+            )
+            return dict(row) if row else None
+
+    async def delete_employee(self, employee_id: str, business_id: str) -> bool:
+        """Delete an employee of a business; returns False if it didn't exist"""
+        if not self.pool:
+            raise DatabaseUnavailable("Database connection not available")
+        
+        async with self._slot(), self._employees_write(), self.pool.acquire() as conn:
+            result = await conn.execute(EMPLOYEE_DELETE_SQL, employee_id, business_id)
+            return result != "DELETE 0"
+
+    async def create_employees_bulk(self, business_id: str, employees: list) -> int:
+        """Create many employees (EmployeeCreate models) in one transaction; returns the number created"""
+        if not self.pool:
+            raise DatabaseUnavailable("Database connection not available")
+        
+        async with self._slot(), self._employees_write(), self.pool.acquire() as conn:
+            async with conn.transaction():
+                if len(employees) < EMPLOYEES_BULK_COPY_THRESHOLD:
+                    await conn.executemany(
+                        EMPLOYEES_BULK_INSERT_SQL,
+                        (
+                            (business_id, e.first_name, e.last_name, e.email, e.hourly_rate)
+                            for e in employees
+                        )
+                    )
+                    return len(employees)
+                
+                await conn.execute(EMPLOYEES_STAGING_SQL)
+                await conn.copy_records_to_table(
+                    'employees_import',
+                    records=(
+                        (e.first_name, e.last_name, e.email, e.hourly_rate)
+                        for e in employees
+                    ),
+                    columns=('first_name', 'last_name', 'email', 'hourly_rate')
+                )
+                result = await conn.execute(EMPLOYEES_MERGE_SQL, business_id)
+                return int(result.split()[-1])
+
+    async def copy_via_staging(self, staging_sql: str, staging_table: str, columns: tuple,
+                               records, merge_sql: str, *merge_args) -> int:
+        """
+        COPY records into a temp staging table and merge them with one INSERT ... SELECT;
+        returns the number of rows merged. The staging table should only use types without
+        a text codec override (binary COPY can't encode uuid/numeric/jsonb here).
+        """
+        if not self.pool:
+            raise DatabaseUnavailable("Database connection not available")
+        
+        async with self._slot(), self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(staging_sql)
+                await conn.copy_records_to_table(staging_table, records=records, columns=columns)
+                result = await conn.execute(merge_sql, *merge_args)
+                return int(result.split()[-1])
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Yield one pooled connection with a transaction open for the block"""
+        if not self.pool:
+            raise DatabaseUnavailable("Database connection not available")
+        
+        async with self._slot(), self.pool.acquire() as conn:
+            async with conn.transaction():
+                yield conn
+
     async def fetch_all(self, query: str, *args):
         """Execute a SELECT query and return all rows"""
         if not self.pool:
-            raise Exception("Database connection not available")
+            raise DatabaseUnavailable("Database connection not available")
             
-        async with self.pool.acquire() as conn:
+        async with self._slot(), self.pool.acquire() as conn:
             return await conn.fetch(query, *args)
 
     async def fetch_one(self, query: str, *args):
         """Execute a query and return one row"""
         if not self.pool:
-            raise Exception("Database connection not available")
+            raise DatabaseUnavailable("Database connection not available")
             
-        async with self.pool.acquire() as conn:
+        async with self._slot(), self.pool.acquire() as conn:
             return await conn.fetchrow(query, *args)
 
     async def execute(self, query: str, *args):
         """Execute a query without returning results (INSERT, UPDATE, DELETE)"""
         if not self.pool:
-            raise Exception("Database connection not available")
+            raise DatabaseUnavailable("Database connection not available")
             
-        async with self.pool.acquire() as conn:
+        async with self._slot(), self.pool.acquire() as conn:
             return await conn.execute(query, *args)
 
 # Global database instance
 db = Database()
+
+
+async def get_db_slot():
+    """FastAPI dependency: fail fast with 503 instead of queueing behind a saturated pool"""
+    if db.overloaded():
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
@@ -1,13 +1,24 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 import uuid
-from datetime import datetime, date, time
+from datetime import datetime, date, time, UTC
+from dataclasses import dataclass
 import os
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
-from db import db
+from time import monotonic
+import hashlib
+import asyncpg
+
+# Load environment variables (before db, which reads its config at import)
+load_dotenv()
+
+from db import db, get_db_slot, DatabaseUnavailable
+from responses import RecordJSONResponse
+from pagination import PaginationParams, encode_cursor, decode_cursor, cursor_uuid
+from services.forecast_client import forecast_client
 
 # Import routes
 from routes.schedule import router as schedule_router
@@ -15,9 +26,6 @@ from routes.calendar import router as calendar_router
 from routes.forecast import router as forecast_router
 from routes.employees import router as employees_router
 
-# Load environment variables
-load_dotenv()
-
 # Pydantic models
 class BusinessCreate(BaseModel):
     name: str
@@ -46,16 +54,16 @@ class Employee(BaseModel):
 class AvailabilityCreate(BaseModel):
     employee_id: str
     day_of_week: int
-    start_time: str  # HH:MM format
-    end_time: str    # HH:MM format
+    start_time: time  # HH:MM or HH:MM:SS
+    end_time: time
     is_available: bool = True
     effective_from: Optional[date] = None
     effective_until: Optional[date] = None
 
 class AvailabilityUpdate(BaseModel):
     day_of_week: Optional[int] = None
-    start_time: Optional[str] = None
-    end_time: Optional[str] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
     is_available: Optional[bool] = None
     effective_from: Optional[date] = None
     effective_until: Optional[date] = None
@@ -65,8 +73,8 @@ class Availability(BaseModel):
     business_id: str
     employee_id: str
     day_of_week: int
-    start_time: str
-    end_time: str
+    start_time: time
+    end_time: time
     is_available: bool
     effective_from: Optional[date]
     effective_until: Optional[date]
@@ -107,31 +115,194 @@ class Budget(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-# In-memory storage (temporary - will be replaced with database)
-businesses_db = []
+# Availability/budget statements, kept as module constants so each one is
+# prepared once per pooled connection and reused from asyncpg's statement cache
+AVAILABILITY_LIST_SQL = """
+SELECT id, business_id, employee_id, day_of_week,
+       start_time, end_time, is_available,
+       effective_from, effective_until, created_at, updated_at
+FROM availability
+WHERE business_id = $1
+ORDER BY day_of_week, start_time, id
+LIMIT $2 OFFSET $3
+"""
+
+# Keyset page after the (day_of_week, start_time, id) of the previous page's last row
+AVAILABILITY_KEYSET_SQL = """
+SELECT id, business_id, employee_id, day_of_week,
+       start_time, end_time, is_available,
+       effective_from, effective_until, created_at, updated_at
+FROM availability
+WHERE business_id = $1
+  AND (day_of_week, start_time, id) > ($3, $4, $5)
+ORDER BY day_of_week, start_time, id
+LIMIT $2
+"""
+
+AVAILABILITY_INSERT_SQL = """
+INSERT INTO availability (business_id, employee_id, day_of_week, start_time, end_time,
+                          is_available, effective_from, effective_until)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+RETURNING id, business_id, employee_id, day_of_week,
+          start_time, end_time, is_available,
+          effective_from, effective_until, created_at, updated_at
+"""
+
+BUDGET_LIST_SQL = """
+SELECT id, business_id, name, budget_type, amount, currency,
+       period_start, period_end, department, is_active,
+       created_at, updated_at
+FROM budgets
+WHERE business_id = $1
+ORDER BY period_start DESC, id DESC
+LIMIT $2 OFFSET $3
+"""
+
+# Keyset page after the (period_start, id) of the previous page's last row
+BUDGET_KEYSET_SQL = """
+SELECT id, business_id, name, budget_type, amount, currency,
+       period_start, period_end, department, is_active,
+       created_at, updated_at
+FROM budgets
+WHERE business_id = $1
+  AND (period_start, id) < ($3, $4)
+ORDER BY period_start DESC, id DESC
+LIMIT $2
+"""
+
+BUDGET_INSERT_SQL = """
+INSERT INTO budgets (business_id, name, budget_type, amount, currency,
+                     period_start, period_end, department, is_active)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+RETURNING id, business_id, name, budget_type, amount, currency,
+          period_start, period_end, department, is_active, created_at, updated_at
+"""
+
+# Batch inserts: one statement per batch, rows passed as parallel arrays and
+# expanded server-side by unnest(). ids and timestamps come from the table
+# defaults; uuid/numeric go over as text/float8 arrays and are cast in SQL.
+AVAILABILITY_BATCH_INSERT_SQL = """
+INSERT INTO availability (business_id, employee_id, day_of_week, start_time, end_time,
+                          is_available, effective_from, effective_until)
+SELECT $1::uuid, r.employee_id::uuid, r.day_of_week, r.start_time, r.end_time,
+       r.is_available, r.effective_from, r.effective_until
+FROM unnest($2::text[], $3::int[], $4::time[], $5::time[], $6::bool[], $7::date[], $8::date[])
+     AS r(employee_id, day_of_week, start_time, end_time, is_available, effective_from, effective_until)
+RETURNING id, business_id, employee_id, day_of_week,
+          start_time, end_time, is_available,
+          effective_from, effective_until, created_at, updated_at
+"""
+
+BUDGET_BATCH_INSERT_SQL = """
+INSERT INTO budgets (business_id, name, budget_type, amount, currency,
+                     period_start, period_end, department, is_active)
+SELECT $1::uuid, r.name, r.budget_type, r.amount::numeric, r.currency,
+       r.period_start, r.period_end, r.department, r.is_active
+FROM unnest($2::text[], $3::text[], $4::float8[], $5::text[], $6::date[], $7::date[], $8::text[], $9::bool[])
+     AS r(name, budget_type, amount, currency, period_start, period_end, department, is_active)
+RETURNING id, business_id, name, budget_type, amount, currency,
+          period_start, period_end, department, is_active, created_at, updated_at
+"""
+
+# Partial updates use one fixed statement per table: a NULL parameter keeps the
+# current value, so every request shares the same prepared statement.
+AVAILABILITY_UPDATE_SQL = """
+UPDATE availability
+SET day_of_week = COALESCE($2, day_of_week),
+    start_time = COALESCE($3, start_time),
+    end_time = COALESCE($4, end_time),
+    is_available = COALESCE($5, is_available),
+    effective_from = COALESCE($6, effective_from),
+    effective_until = COALESCE($7, effective_until),
+    updated_at = now()
+WHERE id = $1
+RETURNING id, business_id, employee_id, day_of_week,
+          start_time, end_time, is_available,
+          effective_from, effective_until, created_at, updated_at
+"""
+
+BUDGET_UPDATE_SQL = """
+UPDATE budgets
+SET name = COALESCE($2, name),
+    budget_type = COALESCE($3, budget_type),
+    amount = COALESCE($4, amount),
+    currency = COALESCE($5, currency),
+    period_start = COALESCE($6, period_start),
+    period_end = COALESCE($7, period_end),
+    department = COALESCE($8, department),
+    is_active = COALESCE($9, is_active),
+    updated_at = now()
+WHERE id = $1
+RETURNING id, business_id, name, budget_type, amount, currency,
+          period_start, period_end, department, is_active, created_at, updated_at
+"""
+
+@dataclass(slots=True, frozen=True)
+class BusinessRow:
+    """Compact in-memory business record (epoch timestamps); converted to Business on egress"""
+    id: str
+    name: str
+    industry: Optional[str]
+    timezone: str
+    created_at: float
+    updated_at: float
+    
+    def to_model(self) -> Business:
+        return Business(
+            id=self.id,
+            name=self.name,
+            industry=self.industry,
+            timezone=self.timezone,
+            created_at=datetime.fromtimestamp(self.created_at, UTC),
+            updated_at=datetime.fromtimestamp(self.updated_at, UTC)
+        )
+
+# In-memory storage (temporary - will be replaced with database), keyed by business id
+businesses_db: dict[str, BusinessRow] = {}
+
+# Encoded GET /businesses response, reused for BUSINESSES_CACHE_TTL seconds and
+# served with an ETag. Business writes bump _businesses_version, which drops it.
+BUSINESSES_CACHE_TTL = 30.0
+_businesses_version = 0
+_businesses_cache: Optional[tuple] = None  # (version, expires_at, etag, body)
+
+async def invalidate_businesses_cache():
+    """Dependency for business writes: invalidate the cached list before and after the write"""
+    global _businesses_version
+    _businesses_version += 1
+    try:
+        yield
+    finally:
+        # Also drop anything a concurrent GET cached while the write was running
+        _businesses_version += 1
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await db.connect()
+    await forecast_client.startup()
     yield
     # Shutdown
+    await forecast_client.shutdown()
     await db.disconnect()
 
 app = FastAPI(
     title="ShiftMind API",
     description="Backend API for ShiftMind application",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=RecordJSONResponse
 )
 
-# Configure CORS
+# Configure CORS (the dev frontends on localhost:5173-5175 and 3000); Starlette
+# compiles the pattern once and fullmatches it against each request's Origin
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:5174", "http://localhost:5175", "http://localhost:3000"],
+    allow_origin_regex=r"http://localhost:(3000|517[345])",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include routers
@@ -140,6 +311,16 @@ app.include_router(calendar_router, prefix="/api", tags=["calendar"])
 app.include_router(forecast_router, prefix="/api/forecast", tags=["forecast"])
 app.include_router(employees_router, prefix="/api", tags=["employees"])
 
+# DB failures surface through these handlers instead of per-route try/except
+@app.exception_handler(asyncpg.PostgresError)
+@app.exception_handler(asyncpg.InterfaceError)
+async def database_error_handler(request: Request, exc: Exception):
+    return RecordJSONResponse(status_code=500, content={"detail": f"Database error: {exc}"})
+
+@app.exception_handler(DatabaseUnavailable)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailable):
+    return RecordJSONResponse(status_code=503, content={"detail": str(exc)})
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -151,48 +332,62 @@ async def root():
     return {"message": "Welcome to ShiftMind API"}
 
 # Business endpoints
-@app.get("/businesses", response_model=List[Business])
-async def get_businesses():
+@app.get("/businesses", response_model=None, responses={200: {"model": List[Business]}},
+         dependencies=[Depends(get_db_slot)])
+async def get_businesses(if_none_match: Optional[str] = Header(None)):
     """Get all businesses"""
-    try:
-        # Try to get from database first
-        query = "SELECT id::text as id, name, industry, timezone, created_at, updated_at FROM businesses ORDER BY created_at DESC"
-        rows = await db.fetch_all(query)
-        
-        if rows:
-            return [
-                Business(
-                    id=str(row['id']),
-                    name=row['name'],
-                    industry=row['industry'],
-                    timezone=row['timezone'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at']
-                )
-                for row in rows
-            ]
-    except Exception as e:
-        print(f"Database error when getting businesses: {e}")
+    global _businesses_cache
+    
+    cached = _businesses_cache
+    if not (cached and cached[0] == _businesses_version and cached[1] > monotonic()):
+        cached = None
+        version = _businesses_version
+        try:
+            # Try to get from database first
+            query = "SELECT id, name, industry, timezone, created_at, updated_at FROM businesses ORDER BY created_at DESC"
+            # Concurrent cache misses share one query; keyed by version so a
+            # request arriving after a business write never joins an older fetch
+            rows = await db.coalesce(f"businesses:{version}", lambda: db.fetch_all(query))
+            
+            if rows:
+                # Rows are already JSON-ready (uuid/numeric codecs), skip model re-validation
+                body = RecordJSONResponse(content=rows).body
+                etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+                cached = (version, monotonic() + BUSINESSES_CACHE_TTL, etag, body)
+                # Don't cache a result that raced with a business write
+                if version == _businesses_version:
+                    _businesses_cache = cached
+        except Exception as e:
+            print(f"Database error when getting businesses: {e}")
+    
+    if cached:
+        headers = {"ETag": cached[2]}
+        if if_none_match and cached[2] in if_none_match:
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached[3], media_type="application/json", headers=headers)
     
     # Fallback to in-memory storage
-    return businesses_db
+    return RecordJSONResponse(content=[row.to_model().model_dump() for row in businesses_db.values()])
 
 # Employee endpoints
-@app.get("/employees", response_model=List[Employee])
+@app.get("/employees", response_model=None, responses={200: {"model": List[Employee]}},
+         dependencies=[Depends(get_db_slot)])
 async def get_employees(business_id: str = Query(..., description="Business ID to get employees for")):
     """Get employees for a specific business"""
-    try:
-        return await db.get_employees(business_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return RecordJSONResponse(content=await db.get_employees(business_id))
+
+@app.get("/bootstrap", dependencies=[Depends(get_db_slot)])
+async def get_bootstrap(business_id: str = Query(..., description="Business ID to get employees for")):
+    """Get the business list and one business's employees in a single DB round trip"""
+    return RecordJSONResponse(content=await db.get_bootstrap(business_id))
 
 # Legacy business endpoints (keeping for backward compatibility)
 @app.get("/businesses-old", response_model=List[Business])
 async def get_businesses_old():
     """Get all businesses (legacy endpoint with full data)"""
-    return businesses_db
+    return [row.to_model() for row in businesses_db.values()]
 
-@app.post("/businesses", response_model=Business)
+@app.post("/businesses", response_model=Business, dependencies=[Depends(invalidate_businesses_cache)])
 async def create_business(business: BusinessCreate):
     """Create a new business"""
     business_id = str(uuid.uuid4())
@@ -200,13 +395,12 @@ async def create_business(business: BusinessCreate):
     try:
         # Insert into database
         query = """
-            INSERT INTO businesses (id, name, industry, timezone, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6)
+            INSERT INTO businesses (id, name, industry, timezone)
+            VALUES ($1, $2, $3, $4)
             RETURNING id, name, industry, timezone, created_at, updated_at
         """
-        now = datetime.utcnow()
         row = await db.fetch_one(query, business_id, business.name, business.industry, 
-                                business.timezone, now, now)
+                                business.timezone)
         
         if row:
             return Business(
@@ -223,8 +417,8 @@ async def create_business(business: BusinessCreate):
     except Exception as e:
         print(f"Database error: {e}")
         # Fallback to in-memory storage
-        now = datetime.utcnow()
-        new_business = Business(
+        now = datetime.now(UTC).timestamp()
+        new_business = BusinessRow(
             id=business_id,
             name=business.name,
             industry=business.industry,
@@ -232,8 +426,8 @@ async def create_business(business: BusinessCreate):
             created_at=now,
             updated_at=now
         )
-        businesses_db.append(new_business)
-        return new_business
+        businesses_db[new_business.id] = new_business
+        return new_business.to_model()
 
 @app.get("/businesses/{business_id}", response_model=Business)
 async def get_business(business_id: str):
@@ -256,26 +450,25 @@ async def get_business(business_id: str):
         print(f"Database error when fetching business: {e}")
     
     # Fallback to in-memory storage
-    for business in businesses_db:
-        if business.id == business_id:
-            return business
+    business = businesses_db.get(business_id)
+    if business:
+        return business.to_model()
     
     raise HTTPException(status_code=404, detail="Business not found")
 
-@app.put("/businesses/{business_id}", response_model=Business)
+@app.put("/businesses/{business_id}", response_model=Business, dependencies=[Depends(invalidate_businesses_cache)])
 async def update_business(business_id: str, business_update: BusinessCreate):
     """Update a business"""
     try:
         # Try to update in database first
         query = """
             UPDATE businesses 
-            SET name = $2, industry = $3, timezone = $4, updated_at = $5
+            SET name = $2, industry = $3, timezone = $4, updated_at = now()
             WHERE id = $1
             RETURNING id::text as id, name, industry, timezone, created_at, updated_at
         """
-        now = datetime.utcnow()
         row = await db.fetch_one(query, business_id, business_update.name, 
-                                business_update.industry, business_update.timezone, now)
+                                business_update.industry, business_update.timezone)
         
         if row:
             return Business(
@@ -290,22 +483,22 @@ async def update_business(business_id: str, business_update: BusinessCreate):
         print(f"Database error when updating business: {e}")
     
     # Fallback to in-memory storage
-    for i, business in enumerate(businesses_db):
-        if business.id == business_id:
-            updated_business = Business(
-                id=business_id,
-                name=business_update.name,
-                industry=business_update.industry,
-                timezone=business_update.timezone,
-                created_at=business.created_at,
-                updated_at=datetime.utcnow()
-            )
-            businesses_db[i] = updated_business
-            return updated_business
+    business = businesses_db.get(business_id)
+    if business:
+        updated_business = BusinessRow(
+            id=business_id,
+            name=business_update.name,
+            industry=business_update.industry,
+            timezone=business_update.timezone,
+            created_at=business.created_at,
+            updated_at=datetime.now(UTC).timestamp()
+        )
+        businesses_db[business_id] = updated_business
+        return updated_business.to_model()
     
     raise HTTPException(status_code=404, detail="Business not found")
 
-@app.delete("/businesses/{business_id}")
+@app.delete("/businesses/{business_id}", dependencies=[Depends(invalidate_businesses_cache)])
 async def delete_business(business_id: str):
     """Delete a business"""
     try:
@@ -319,358 +512,179 @@ async def delete_business(business_id: str):
         print(f"Database error when deleting business: {e}")
     
     # Fallback to in-memory storage
-    for i, business in enumerate(businesses_db):
-        if business.id == business_id:
-            deleted_business = businesses_db.pop(i)
-            return {"message": f"Business '{deleted_business.name}' deleted successfully"}
+    deleted_business = businesses_db.pop(business_id, None)
+    if deleted_business:
+        return {"message": f"Business '{deleted_business.name}' deleted successfully"}
     
     raise HTTPException(status_code=404, detail="Business not found")
 
 # Availability endpoints
-@app.get("/availability", response_model=List[Availability])
+@app.get("/availability", response_model=None, responses={200: {"model": List[Availability]}})
 async def get_availability(
     business_id: str = Query(..., description="Business ID to get availability for"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=1000, description="Items per page")
+    pag: PaginationParams = Depends()
 ):
     """Get availability records for a specific business"""
-    try:
-        offset = (page - 1) * page_size
-        query = """
-            SELECT id, business_id, employee_id, day_of_week, 
-                   start_time::text, end_time::text, is_available,
-                   effective_from, effective_until, created_at, updated_at
-            FROM availability 
-            WHERE business_id = $1 
-            ORDER BY day_of_week, start_time
-            LIMIT $2 OFFSET $3
-        """
-        rows = await db.fetch_all(query, business_id, page_size, offset)
-        return [
-            Availability(
-                id=str(row['id']),
-                business_id=str(row['business_id']),
-                employee_id=str(row['employee_id']),
-                day_of_week=row['day_of_week'],
-                start_time=row['start_time'],
-                end_time=row['end_time'],
-                is_available=row['is_available'],
-                effective_from=row['effective_from'],
-                effective_until=row['effective_until'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            ) for row in rows
-        ]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-
-@app.post("/availability", response_model=Availability)
+    if pag.cursor:
+        try:
+            values = decode_cursor(pag.cursor)
+            if not isinstance(values, list) or len(values) != 3:
+                raise ValueError("cursor doesn't match the (day_of_week, start_time, id) sort key")
+            day_of_week, start_time, last_id = values
+            if isinstance(day_of_week, bool) or not isinstance(day_of_week, int):
+                raise ValueError("cursor day_of_week must be an integer")
+            start_time = time.fromisoformat(start_time)
+            last_id = cursor_uuid(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        rows = await db.fetch_all(
+            AVAILABILITY_KEYSET_SQL, business_id, pag.limit, day_of_week, start_time, last_id
+        )
+    else:
+        rows = await db.fetch_all(AVAILABILITY_LIST_SQL, business_id, pag.limit, pag.offset)
+    headers = None
+    if len(rows) == pag.limit:
+        last = rows[-1]
+        headers = {"X-Next-Cursor": encode_cursor(last['day_of_week'], last['start_time'], last['id'])}
+    # Rows are already JSON-ready (uuid/numeric codecs), skip model re-validation
+    return RecordJSONResponse(content=rows, headers=headers)
+
+@app.post("/availability", response_model=None, responses={200: {"model": Availability}})
 async def create_availability(availability: AvailabilityCreate, business_id: str = Query(...)):
     """Create new availability record"""
-    try:
-        availability_id = str(uuid.uuid4())
-        now = datetime.utcnow()
-        query = """
-            INSERT INTO availability (id, business_id, employee_id, day_of_week, start_time, end_time, 
-                                   is_available, effective_from, effective_until, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-            RETURNING id, business_id, employee_id, day_of_week, 
-                     start_time::text, end_time::text, is_available,
-                     effective_from, effective_until, created_at, updated_at
-        """
-        # Parse string times to time objects
-        start_time = datetime.strptime(availability.start_time, '%H:%M:%S').time() if ':' in availability.start_time and availability.start_time.count(':') == 2 else datetime.strptime(availability.start_time, '%H:%M').time()
-        end_time = datetime.strptime(availability.end_time, '%H:%M:%S').time() if ':' in availability.end_time and availability.end_time.count(':') == 2 else datetime.strptime(availability.end_time, '%H:%M').time()
-        
-        row = await db.fetch_one(
-            query, 
-            availability_id, business_id, availability.employee_id, availability.day_of_week,
-            start_time, end_time, availability.is_available,
-            availability.effective_from, availability.effective_until, now, now
-        )
-        return Availability(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            employee_id=str(row['employee_id']),
-            day_of_week=row['day_of_week'],
-            start_time=row['start_time'],
-            end_time=row['end_time'],
-            is_available=row['is_available'],
-            effective_from=row['effective_from'],
-            effective_until=row['effective_until'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-
-@app.put("/availability/{availability_id}", response_model=Availability)
+    row = await db.fetch_one(
+        AVAILABILITY_INSERT_SQL,
+        business_id, availability.employee_id, availability.day_of_week,
+        availability.start_time, availability.end_time, availability.is_available,
+        availability.effective_from, availability.effective_until
+    )
+    return RecordJSONResponse(content=row)
+
+@app.post("/availability/batch", response_model=None, responses={200: {"model": List[Availability]}})
+async def create_availability_batch(items: List[AvailabilityCreate], business_id: str = Query(...)):
+    """Create many availability records in a single round trip"""
+    if not items:
+        return []
+    rows = await db.fetch_all(
+        AVAILABILITY_BATCH_INSERT_SQL,
+        business_id,
+        [a.employee_id for a in items],
+        [a.day_of_week for a in items],
+        [a.start_time for a in items],
+        [a.end_time for a in items],
+        [a.is_available for a in items],
+        [a.effective_from for a in items],
+        [a.effective_until for a in items]
+    )
+    return RecordJSONResponse(content=rows)
+
+@app.put("/availability/{availability_id}", response_model=None, responses={200: {"model": Availability}})
 async def update_availability(availability_id: str, availability: AvailabilityUpdate):
     """Update availability record"""
-    try:
-        # Build dynamic update query
-        update_fields = []
-        values = []
-        param_count = 1
-        
-        if availability.day_of_week is not None:
-            update_fields.append(f"day_of_week = ${param_count}")
-            values.append(availability.day_of_week)
-            param_count += 1
-            
-        if availability.start_time is not None:
-            update_fields.append(f"start_time = ${param_count}")
-            # Parse string time to time object
-            start_time = datetime.strptime(availability.start_time, '%H:%M:%S').time() if ':' in availability.start_time and availability.start_time.count(':') == 2 else datetime.strptime(availability.start_time, '%H:%M').time()
-            values.append(start_time)
-            param_count += 1
-            
-        if availability.end_time is not None:
-            update_fields.append(f"end_time = ${param_count}")
-            # Parse string time to time object
-            end_time = datetime.strptime(availability.end_time, '%H:%M:%S').time() if ':' in availability.end_time and availability.end_time.count(':') == 2 else datetime.strptime(availability.end_time, '%H:%M').time()
-            values.append(end_time)
-            param_count += 1
-            
-        if availability.is_available is not None:
-            update_fields.append(f"is_available = ${param_count}")
-            values.append(availability.is_available)
-            param_count += 1
-            
-        if availability.effective_from is not None:
-            update_fields.append(f"effective_from = ${param_count}")
-            values.append(availability.effective_from)
-            param_count += 1
-            
-        if availability.effective_until is not None:
-            update_fields.append(f"effective_until = ${param_count}")
-            values.append(availability.effective_until)
-            param_count += 1
-            
-        if not update_fields:
-            raise HTTPException(status_code=400, detail="No fields to update")
-            
-        update_fields.append(f"updated_at = ${param_count}")
-        values.append(datetime.utcnow())
-        param_count += 1
-        
-        values.append(availability_id)  # for WHERE clause
-        
-        query = f"""
-            UPDATE availability 
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_count}
-            RETURNING id, business_id, employee_id, day_of_week, 
-                     start_time::text, end_time::text, is_available,
-                     effective_from, effective_until, created_at, updated_at
-        """
+    if not availability.model_dump(exclude_none=True):
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    row = await db.fetch_one(
+        AVAILABILITY_UPDATE_SQL,
+        availability_id, availability.day_of_week, availability.start_time, availability.end_time,
+        availability.is_available, availability.effective_from, availability.effective_until
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Availability record not found")
         
-        row = await db.fetch_one(query, *values)
-        if not row:
-            raise HTTPException(status_code=404, detail="Availability record not found")
-            
-        return Availability(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            employee_id=str(row['employee_id']),
-            day_of_week=row['day_of_week'],
-            start_time=row['start_time'],
-            end_time=row['end_time'],
-            is_available=row['is_available'],
-            effective_from=row['effective_from'],
-            effective_until=row['effective_until'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return RecordJSONResponse(content=row)
 
 @app.delete("/availability/{availability_id}")
 async def delete_availability(availability_id: str):
     """Delete availability record"""
-    try:
-        query = "DELETE FROM availability WHERE id = $1 RETURNING id"
-        row = await db.fetch_one(query, availability_id)
-        if not row:
-            raise HTTPException(status_code=404, detail="Availability record not found")
-        return {"message": "Availability record deleted successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    query = "DELETE FROM availability WHERE id = $1 RETURNING id"
+    row = await db.fetch_one(query, availability_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Availability record not found")
+    return {"message": "Availability record deleted successfully"}
 
 # Budget endpoints
-@app.get("/budgets", response_model=List[Budget])
+@app.get("/budgets", response_model=None, responses={200: {"model": List[Budget]}})
 async def get_budgets(
     business_id: str = Query(..., description="Business ID to get budgets for"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=1000, description="Items per page")
+    pag: PaginationParams = Depends()
 ):
     """Get budget records for a specific business"""
-    try:
-        offset = (page - 1) * page_size
-        query = """
-            SELECT id, business_id, name, budget_type, amount, currency,
-                   period_start, period_end, department, is_active,
-                   created_at, updated_at
-            FROM budgets 
-            WHERE business_id = $1 
-            ORDER BY period_start DESC
-            LIMIT $2 OFFSET $3
-        """
-        rows = await db.fetch_all(query, business_id, page_size, offset)
-        return [
-            Budget(
-                id=str(row['id']),
-                business_id=str(row['business_id']),
-                name=row['name'],
-                budget_type=row['budget_type'],
-                amount=float(row['amount']),
-                currency=row['currency'],
-                period_start=row['period_start'],
-                period_end=row['period_end'],
-                department=row['department'],
-                is_active=row['is_active'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            ) for row in rows
-        ]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-
-@app.post("/budgets", response_model=Budget)
+    if pag.cursor:
+        try:
+            values = decode_cursor(pag.cursor)
+            if not isinstance(values, list) or len(values) != 2:
+                raise ValueError("cursor doesn't match the (period_start, id) sort key")
+            period_start, last_id = values
+            period_start = date.fromisoformat(period_start)
+            last_id = cursor_uuid(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        rows = await db.fetch_all(BUDGET_KEYSET_SQL, business_id, pag.limit, period_start, last_id)
+    else:
+        rows = await db.fetch_all(BUDGET_LIST_SQL, business_id, pag.limit, pag.offset)
+    headers = None
+    if len(rows) == pag.limit:
+        last = rows[-1]
+        headers = {"X-Next-Cursor": encode_cursor(last['period_start'], last['id'])}
+    # Rows are already JSON-ready (uuid/numeric codecs), skip model re-validation
+    return RecordJSONResponse(content=rows, headers=headers)
+
+@app.post("/budgets", response_model=None, responses={200: {"model": Budget}})
 async def create_budget(budget: BudgetCreate, business_id: str = Query(...)):
     """Create new budget record"""
-    try:
-        budget_id = str(uuid.uuid4())
-        now = datetime.utcnow()
-        query = """
-            INSERT INTO budgets (id, business_id, name, budget_type, amount, currency,
-                               period_start, period_end, department, is_active, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-            RETURNING id, business_id, name, budget_type, amount, currency,
-                     period_start, period_end, department, is_active, created_at, updated_at
-        """
-        row = await db.fetch_one(
-            query, 
-            budget_id, business_id, budget.name, budget.budget_type, budget.amount,
-            budget.currency, budget.period_start, budget.period_end, budget.department,
-            budget.is_active, now, now
-        )
-        return Budget(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            name=row['name'],
-            budget_type=row['budget_type'],
-            amount=float(row['amount']),
-            currency=row['currency'],
-            period_start=row['period_start'],
-            period_end=row['period_end'],
-            department=row['department'],
-            is_active=row['is_active'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-
-@app.put("/budgets/{budget_id}", response_model=Budget)
+    row = await db.fetch_one(
+        BUDGET_INSERT_SQL,
+        business_id, budget.name, budget.budget_type, budget.amount,
+        budget.currency, budget.period_start, budget.period_end, budget.department,
+        budget.is_active
+    )
+    return RecordJSONResponse(content=row)
+
+@app.post("/budgets/batch", response_model=None, responses={200: {"model": List[Budget]}})
+async def create_budget_batch(items: List[BudgetCreate], business_id: str = Query(...)):
+    """Create many budget records in a single round trip"""
+    if not items:
+        return []
+    rows = await db.fetch_all(
+        BUDGET_BATCH_INSERT_SQL,
+        business_id,
+        [b.name for b in items],
+        [b.budget_type for b in items],
+        [b.amount for b in items],
+        [b.currency for b in items],
+        [b.period_start for b in items],
+        [b.period_end for b in items],
+        [b.department for b in items],
+        [b.is_active for b in items]
+    )
+    return RecordJSONResponse(content=rows)
+
+@app.put("/budgets/{budget_id}", response_model=None, responses={200: {"model": Budget}})
 async def update_budget(budget_id: str, budget: BudgetUpdate):
     """Update budget record"""
-    try:
-        # Build dynamic update query
-        update_fields = []
-        values = []
-        param_count = 1
-        
-        if budget.name is not None:
-            update_fields.append(f"name = ${param_count}")
-            values.append(budget.name)
-            param_count += 1
-            
-        if budget.budget_type is not None:
-            update_fields.append(f"budget_type = ${param_count}")
-            values.append(budget.budget_type)
-            param_count += 1
-            
-        if budget.amount is not None:
-            update_fields.append(f"amount = ${param_count}")
-            values.append(budget.amount)
-            param_count += 1
-            
-        if budget.currency is not None:
-            update_fields.append(f"currency = ${param_count}")
-            values.append(budget.currency)
-            param_count += 1
-            
-        if budget.period_start is not None:
-            update_fields.append(f"period_start = ${param_count}")
-            values.append(budget.period_start)
-            param_count += 1
-            
-        if budget.period_end is not None:
-            update_fields.append(f"period_end = ${param_count}")
-            values.append(budget.period_end)
-            param_count += 1
-            
-        if budget.department is not None:
-            update_fields.append(f"department = ${param_count}")
-            values.append(budget.department)
-            param_count += 1
-            
-        if budget.is_active is not None:
-            update_fields.append(f"is_active = ${param_count}")
-            values.append(budget.is_active)
-            param_count += 1
-            
-        if not update_fields:
-            raise HTTPException(status_code=400, detail="No fields to update")
-            
-        update_fields.append(f"updated_at = ${param_count}")
-        values.append(datetime.utcnow())
-        param_count += 1
-        
-        values.append(budget_id)  # for WHERE clause
-        
-        query = f"""
-            UPDATE budgets 
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_count}
-            RETURNING id, business_id, name, budget_type, amount, currency,
-                     period_start, period_end, department, is_active, created_at, updated_at
-        """
+    if not budget.model_dump(exclude_none=True):
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    row = await db.fetch_one(
+        BUDGET_UPDATE_SQL,
+        budget_id, budget.name, budget.budget_type, budget.amount, budget.currency,
+        budget.period_start, budget.period_end, budget.department, budget.is_active
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Budget record not found")
         
-        row = await db.fetch_one(query, *values)
-        if not row:
-            raise HTTPException(status_code=404, detail="Budget record not found")
-            
-        return Budget(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            name=row['name'],
-            budget_type=row['budget_type'],
-            amount=float(row['amount']),
-            currency=row['currency'],
-            period_start=row['period_start'],
-            period_end=row['period_end'],
-            department=row['department'],
-            is_active=row['is_active'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return RecordJSONResponse(content=row)
 
 @app.delete("/budgets/{budget_id}")
 async def delete_budget(budget_id: str):
     """Delete budget record"""
-    try:
-        query = "DELETE FROM budgets WHERE id = $1 RETURNING id"
-        row = await db.fetch_one(query, budget_id)
-        if not row:
-            raise HTTPException(status_code=404, detail="Budget record not found")
-        return {"message": "Budget record deleted successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    query = "DELETE FROM budgets WHERE id = $1 RETURNING id"
+    row = await db.fetch_one(query, budget_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Budget record not found")
+    return {"message": "Budget record deleted successfully"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Paging helpers shared by the list endpoints.
+"""
+
+import base64
+import uuid
+from typing import Optional
+
+import orjson
+from fastapi import Query
+
+
+class PaginationParams:
+    """Shared page/page_size/cursor query parameters of the paged list endpoints"""
+    __slots__ = ("limit", "offset", "cursor")
+    
+    def __init__(
+        self,
+        page: int = Query(1, ge=1, description="Page number"),
+        page_size: int = Query(100, ge=1, le=1000, description="Items per page"),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces page")
+    ):
+        self.limit = page_size
+        self.offset = (page - 1) * page_size
+        self.cursor = cursor
+
+
+def encode_cursor(*values) -> str:
+    """Opaque page cursor: the sort key of the last row on the page"""
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    return orjson.loads(base64.urlsafe_b64decode(cursor))
+
+
+def cursor_uuid(value) -> str:
+    """Validate a row id taken from a decoded cursor; raises ValueError unless it's a UUID string"""
+    if not isinstance(value, str):
+        raise ValueError("cursor id must be a string")
+    uuid.UUID(value)
+    return value
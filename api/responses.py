@@ -0,0 +1,27 @@
+"""
+Response classes shared by the API routes.
+"""
+
+from typing import Any
+
+import asyncpg
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _default(obj: Any) -> Any:
+    """orjson fallback for types it doesn't know natively"""
+    if isinstance(obj, asyncpg.Record):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class RecordJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also serializes asyncpg Records, so DB rows can be returned as-is"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
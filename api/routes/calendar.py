@@ -1,24 +1,162 @@
 # Copilot: CRUD endpoints; all queries filtered by business_id.
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
 from typing import List, Dict, Optional
 from datetime import datetime
 from datetime import date as date_type
-import uuid
-import json
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from decimal import Decimal
+from time import monotonic
+import os
+import orjson
 
 from db import db
+from responses import RecordJSONResponse
+from pagination import PaginationParams, encode_cursor, decode_cursor, cursor_uuid
 
 router = APIRouter()
 
+# Encoded list responses, cached per (endpoint, business, version, filters, page)
+# for CALENDAR_CACHE_TTL seconds. A write bumps its business's version, which
+# makes every older entry for that business unreachable.
+CALENDAR_CACHE_TTL = float(os.getenv("CALENDAR_CACHE_TTL", "60"))
+CALENDAR_CACHE_MAX_ENTRIES = 1024
+_calendar_versions: Dict[str, int] = {}
+_calendar_cache: Dict[tuple, tuple] = {}  # key -> (expires_at, body, next_cursor)
+
+def _cache_key(endpoint: str, business_id: str, *params) -> tuple:
+    return (endpoint, business_id, _calendar_versions.get(business_id, 0), *params)
+
+def _cache_get(key: tuple) -> Optional[Response]:
+    entry = _calendar_cache.get(key)
+    if entry and entry[0] > monotonic():
+        headers = {"X-Next-Cursor": entry[2]} if entry[2] else None
+        return Response(content=entry[1], media_type="application/json", headers=headers)
+    return None
+
+def _cache_put(key: tuple, response: Response) -> Response:
+    if len(_calendar_cache) >= CALENDAR_CACHE_MAX_ENTRIES:
+        _calendar_cache.clear()
+    _calendar_cache[key] = (
+        monotonic() + CALENDAR_CACHE_TTL, response.body, response.headers.get("x-next-cursor")
+    )
+    return response
+
+def _invalidate_calendar(business_id: str):
+    """Call after any write to a business's profiles, overrides or events"""
+    _calendar_versions[business_id] = _calendar_versions.get(business_id, 0) + 1
+
+# Keyset pages continue after the (priority, name, id) of the previous page's last row
+SEASONAL_PROFILES_LIST_SQL = """
+SELECT id, business_id, name, profile_type, multiplier_data,
+       is_active, priority, created_at, updated_at
+FROM seasonal_profiles
+WHERE business_id = $1
+ORDER BY priority ASC, name ASC, id ASC
+LIMIT $2 OFFSET $3
+"""
+
+SEASONAL_PROFILES_KEYSET_SQL = """
+SELECT id, business_id, name, profile_type, multiplier_data,
+       is_active, priority, created_at, updated_at
+FROM seasonal_profiles
+WHERE business_id = $1 AND (priority, name, id) > ($3::int, $4::text, $5::uuid)
+ORDER BY priority ASC, name ASC, id ASC
+LIMIT $2
+"""
+
+# Partial updates use one fixed statement per table: a NULL parameter keeps the
+# current value, so every request shares the same prepared statement.
+SEASONAL_PROFILE_UPDATE_SQL = """
+UPDATE seasonal_profiles
+SET name = COALESCE($2, name),
+    profile_type = COALESCE($3, profile_type),
+    multiplier_data = COALESCE($4::jsonb, multiplier_data),
+    is_active = COALESCE($5, is_active),
+    priority = COALESCE($6, priority),
+    updated_at = now()
+WHERE id = $1
+RETURNING id, business_id, name, profile_type, multiplier_data,
+          is_active, priority, created_at, updated_at
+"""
+
+CALENDAR_OVERRIDE_UPDATE_SQL = """
+UPDATE calendar_overrides
+SET date = COALESCE($2, date),
+    override_type = COALESCE($3, override_type),
+    multiplier = COALESCE($4, multiplier),
+    custom_hours = COALESCE($5::jsonb, custom_hours),
+    description = COALESCE($6, description),
+    is_active = COALESCE($7, is_active),
+    updated_at = now()
+WHERE id = $1
+RETURNING id, business_id, date, override_type, multiplier, custom_hours,
+          description, is_active, created_at, updated_at
+"""
+
+# Bulk imports COPY into a plain-typed staging table (binary COPY can't go
+# through the text uuid/numeric/jsonb codecs), then merge in one INSERT
+CALENDAR_OVERRIDES_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS calendar_overrides_import (
+    date DATE, override_type TEXT, multiplier FLOAT8, custom_hours TEXT,
+    description TEXT, is_active BOOLEAN
+) ON COMMIT DELETE ROWS
+"""
+
+CALENDAR_OVERRIDES_MERGE_SQL = """
+INSERT INTO calendar_overrides (business_id, date, override_type, multiplier,
+                                custom_hours, description, is_active)
+SELECT $1::uuid, date, override_type, multiplier::numeric, custom_hours::jsonb,
+       description, is_active
+FROM calendar_overrides_import
+"""
+
+BUSINESS_EVENT_UPDATE_SQL = """
+UPDATE business_events
+SET name = COALESCE($2, name),
+    event_type = COALESCE($3, event_type),
+    start_date = COALESCE($4, start_date),
+    end_date = COALESCE($5, end_date),
+    expected_impact = COALESCE($6, expected_impact),
+    description = COALESCE($7, description),
+    location = COALESCE($8, location),
+    is_recurring = COALESCE($9, is_recurring),
+    recurrence_pattern = COALESCE($10::jsonb, recurrence_pattern),
+    updated_at = now()
+WHERE id = $1
+RETURNING id, business_id, name, event_type, start_date, end_date,
+          expected_impact, description, location, is_recurring,
+          recurrence_pattern, created_at, updated_at
+"""
+
 # Pydantic Models
+def normalize_multiplier_data(data: Optional[Dict]) -> Optional[Dict[str, float]]:
+    """
+    Canonicalize hourly multipliers to {"00": float, ..., "23": float}, in hour order
+    
+    Keys may be "7" or "07"; hours without a multiplier are left out (they
+    fall through to lower-priority profiles). Normalizing on write keeps the
+    stored jsonb uniform for the AI service, which reads it per hour.
+    """
+    if data is None:
+        return None
+    hourly = {}
+    for key, value in data.items():
+        hour = int(key)  # ValueError -> 422
+        if not 0 <= hour <= 23:
+            raise ValueError(f"hour {key!r} is outside 00-23")
+        if value is None or isinstance(value, (bool, dict, list)):
+            raise ValueError(f"multiplier for hour {key!r} must be a number")
+        hourly[hour] = float(value)
+    return {f"{hour:02d}": hourly[hour] for hour in sorted(hourly)}
+
 class SeasonalProfileCreate(BaseModel):
     name: str
     profile_type: str = Field(..., pattern="^(weekly|monthly|seasonal|holiday)$")
     multiplier_data: Dict  # 24-hour array as {"00": 1.0, "01": 1.2, ...}
     is_active: bool = True
     priority: int = 1
+    
+    _normalize_multipliers = field_validator('multiplier_data')(normalize_multiplier_data)
 
 class SeasonalProfileUpdate(BaseModel):
     name: Optional[str] = None
@@ -26,6 +164,8 @@ class SeasonalProfileUpdate(BaseModel):
     multiplier_data: Optional[Dict] = None
     is_active: Optional[bool] = None
     priority: Optional[int] = None
+    
+    _normalize_multipliers = field_validator('multiplier_data')(normalize_multiplier_data)
 
 class SeasonalProfile(BaseModel):
     id: str
@@ -104,148 +244,93 @@ class BusinessEvent(BaseModel):
     updated_at: datetime
 
 # Seasonal Profiles Endpoints
-@router.get("/seasonal-profiles", response_model=List[SeasonalProfile])
+@router.get("/seasonal-profiles", response_model=None, responses={200: {"model": List[SeasonalProfile]}})
 async def get_seasonal_profiles(
     business_id: str = Query(..., description="Business ID"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=1000, description="Items per page")
+    pag: PaginationParams = Depends()
 ):
     """Get seasonal profiles for a business"""
+    if pag.cursor:
+        try:
+            priority, name, last_id = decode_cursor(pag.cursor)
+            if type(priority) is not int or not isinstance(name, str):
+                raise ValueError("cursor doesn't match the (priority, name, id) sort key")
+            last_id = cursor_uuid(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    key = _cache_key("seasonal-profiles", business_id, pag.limit, pag.offset, pag.cursor)
+    cached = _cache_get(key)
+    if cached:
+        return cached
+    
     try:
-        offset = (page - 1) * page_size
-        query = """
-            SELECT id, business_id, name, profile_type, multiplier_data, 
-                   is_active, priority, created_at, updated_at
-            FROM seasonal_profiles 
-            WHERE business_id = $1 
-            ORDER BY priority ASC, name ASC
-            LIMIT $2 OFFSET $3
-        """
-        rows = await db.fetch_all(query, business_id, page_size, offset)
-        
-        return [
-            SeasonalProfile(
-                id=str(row['id']),
-                business_id=str(row['business_id']),
-                name=row['name'],
-                profile_type=row['profile_type'],
-                multiplier_data=row['multiplier_data'] if isinstance(row['multiplier_data'], dict) else json.loads(row['multiplier_data']),
-                is_active=row['is_active'],
-                priority=row['priority'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            ) for row in rows
-        ]
+        if pag.cursor:
+            rows = await db.fetch_all(
+                SEASONAL_PROFILES_KEYSET_SQL, business_id, pag.limit, priority, name, last_id
+            )
+        else:
+            rows = await db.fetch_all(SEASONAL_PROFILES_LIST_SQL, business_id, pag.limit, pag.offset)
+        headers = None
+        if len(rows) == pag.limit:
+            last = rows[-1]
+            headers = {"X-Next-Cursor": encode_cursor(last['priority'], last['name'], last['id'])}
+        # Rows are already JSON-ready (uuid/numeric/jsonb codecs), skip model re-validation
+        return _cache_put(key, RecordJSONResponse(content=rows, headers=headers))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה בטעינת פרופילי עונתיות: {str(e)}")
 
-@router.post("/seasonal-profiles", response_model=SeasonalProfile)
+@router.post("/seasonal-profiles", response_model=None, responses={200: {"model": SeasonalProfile}})
 async def create_seasonal_profile(
     profile: SeasonalProfileCreate,
     business_id: str = Query(..., description="Business ID")
 ):
     """Create new seasonal profile"""
     try:
-        profile_id = str(uuid.uuid4())
-        now = datetime.utcnow()
-        
+        # id and created_at/updated_at come from the table defaults; Postgres
+        # renders the new row as JSON, which is sent as the response body as-is
         query = """
-            INSERT INTO seasonal_profiles (id, business_id, name, profile_type, multiplier_data, 
-                                         is_active, priority, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            RETURNING id, business_id, name, profile_type, multiplier_data, 
-                     is_active, priority, created_at, updated_at
+            WITH r AS (
+                INSERT INTO seasonal_profiles (business_id, name, profile_type, multiplier_data, 
+                                             is_active, priority)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                RETURNING id, business_id, name, profile_type, multiplier_data, 
+                         is_active, priority, created_at, updated_at
+            )
+            SELECT row_to_json(r)::text FROM r
         """
         
         row = await db.fetch_one(
             query,
-            profile_id, business_id, profile.name, profile.profile_type,
-            json.dumps(profile.multiplier_data), profile.is_active, profile.priority, now, now
+            business_id, profile.name, profile.profile_type,
+            profile.multiplier_data, profile.is_active, profile.priority
         )
+        _invalidate_calendar(business_id)
         
-        return SeasonalProfile(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            name=row['name'],
-            profile_type=row['profile_type'],
-            multiplier_data=row['multiplier_data'] if isinstance(row['multiplier_data'], dict) else json.loads(row['multiplier_data']),
-            is_active=row['is_active'],
-            priority=row['priority'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
+        return Response(content=row[0], media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה ביצירת פרופיל עונתיות: {str(e)}")
 
-@router.put("/seasonal-profiles/{profile_id}", response_model=SeasonalProfile)
+@router.put("/seasonal-profiles/{profile_id}", response_model=None, responses={200: {"model": SeasonalProfile}})
 async def update_seasonal_profile(
     profile_id: str,
     profile: SeasonalProfileUpdate
 ):
     """Update seasonal profile"""
     try:
-        # Build dynamic update query
-        update_fields = []
-        values = []
-        param_count = 1
-        
-        if profile.name is not None:
-            update_fields.append(f"name = ${param_count}")
-            values.append(profile.name)
-            param_count += 1
-            
-        if profile.profile_type is not None:
-            update_fields.append(f"profile_type = ${param_count}")
-            values.append(profile.profile_type)
-            param_count += 1
-            
-        if profile.multiplier_data is not None:
-            update_fields.append(f"multiplier_data = ${param_count}")
-            values.append(json.dumps(profile.multiplier_data))
-            param_count += 1
-            
-        if profile.is_active is not None:
-            update_fields.append(f"is_active = ${param_count}")
-            values.append(profile.is_active)
-            param_count += 1
-            
-        if profile.priority is not None:
-            update_fields.append(f"priority = ${param_count}")
-            values.append(profile.priority)
-            param_count += 1
-            
-        if not update_fields:
+        if not profile.model_dump(exclude_none=True):
             raise HTTPException(status_code=400, detail="אין שדות לעדכון")
-            
-        update_fields.append(f"updated_at = ${param_count}")
-        values.append(datetime.utcnow())
-        param_count += 1
-        
-        values.append(profile_id)  # for WHERE clause
         
-        query = f"""
-            UPDATE seasonal_profiles 
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_count}
-            RETURNING id, business_id, name, profile_type, multiplier_data, 
-                     is_active, priority, created_at, updated_at
-        """
-        
-        row = await db.fetch_one(query, *values)
+        row = await db.fetch_one(
+            SEASONAL_PROFILE_UPDATE_SQL,
+            profile_id, profile.name, profile.profile_type, profile.multiplier_data,
+            profile.is_active, profile.priority
+        )
         if not row:
             raise HTTPException(status_code=404, detail="פרופיל עונתיות לא נמצא")
+        _invalidate_calendar(row['business_id'])
             
-        return SeasonalProfile(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            name=row['name'],
-            profile_type=row['profile_type'],
-            multiplier_data=row['multiplier_data'] if isinstance(row['multiplier_data'], dict) else json.loads(row['multiplier_data']),
-            is_active=row['is_active'],
-            priority=row['priority'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
+        return RecordJSONResponse(content=row)
     except HTTPException:
         raise
     except Exception as e:
@@ -255,10 +340,11 @@ async def update_seasonal_profile(
 async def delete_seasonal_profile(profile_id: str):
     """Delete seasonal profile"""
     try:
-        query = "DELETE FROM seasonal_profiles WHERE id = $1 RETURNING id"
+        query = "DELETE FROM seasonal_profiles WHERE id = $1 RETURNING business_id"
         row = await db.fetch_one(query, profile_id)
         if not row:
             raise HTTPException(status_code=404, detail="פרופיל עונתיות לא נמצא")
+        _invalidate_calendar(row['business_id'])
         return {"message": "פרופיל עונתיות נמחק בהצלחה"}
     except HTTPException:
         raise
@@ -266,22 +352,33 @@ async def delete_seasonal_profile(profile_id: str):
         raise HTTPException(status_code=500, detail=f"שגיאה במחיקת פרופיל עונתיות: {str(e)}")
 
 # Calendar Overrides Endpoints
-@router.get("/calendar-overrides", response_model=List[CalendarOverride])
+@router.get("/calendar-overrides", response_model=None, responses={200: {"model": List[CalendarOverride]}})
 async def get_calendar_overrides(
     business_id: str = Query(..., description="Business ID"),
     start_date: Optional[date_type] = Query(None, description="Start date filter"),
     end_date: Optional[date_type] = Query(None, description="End date filter"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=1000, description="Items per page")
+    pag: PaginationParams = Depends()
 ):
     """Get calendar overrides for a business"""
+    if pag.cursor:
+        try:
+            last_date, last_id = decode_cursor(pag.cursor)
+            last_date = date_type.fromisoformat(last_date)
+            last_id = cursor_uuid(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    key = _cache_key("calendar-overrides", business_id, start_date, end_date,
+                     pag.limit, pag.offset, pag.cursor)
+    cached = _cache_get(key)
+    if cached:
+        return cached
+    
     try:
-        offset = (page - 1) * page_size
-        
         # Build query with optional date filters
         where_clauses = ["business_id = $1"]
-        params = [business_id]
-        param_count = 2
+        params = [business_id, pag.limit]
+        param_count = 3
         
         if start_date:
             where_clauses.append(f"date >= ${param_count}")
@@ -293,151 +390,119 @@ async def get_calendar_overrides(
             params.append(end_date)
             param_count += 1
         
-        params.extend([page_size, offset])
+        if pag.cursor:
+            where_clauses.append(f"(date, id) < (${param_count}::date, ${param_count + 1}::uuid)")
+            params.extend([last_date, last_id])
+            paging = "LIMIT $2"
+        else:
+            params.append(pag.offset)
+            paging = f"LIMIT $2 OFFSET ${param_count}"
         
+        # Postgres builds the whole page as one JSON document; cast to text so
+        # the jsonb codec does not decode it back into Python objects
         query = f"""
-            SELECT id, business_id, date, override_type, multiplier, custom_hours,
-                   description, is_active, created_at, updated_at
-            FROM calendar_overrides 
-            WHERE {' AND '.join(where_clauses)}
-            ORDER BY date DESC
-            LIMIT ${param_count} OFFSET ${param_count + 1}
+            SELECT coalesce(json_agg(t ORDER BY t.date DESC, t.id DESC), '[]')::text,
+                   count(*),
+                   (array_agg(t.date ORDER BY t.date, t.id))[1],
+                   (array_agg(t.id ORDER BY t.date, t.id))[1]
+            FROM (
+                SELECT id, business_id, date, override_type, multiplier, custom_hours,
+                       description, is_active, created_at, updated_at
+                FROM calendar_overrides 
+                WHERE {' AND '.join(where_clauses)}
+                ORDER BY date DESC, id DESC
+                {paging}
+            ) t
         """
         
-        rows = await db.fetch_all(query, *params)
-        
-        return [
-            CalendarOverride(
-                id=str(row['id']),
-                business_id=str(row['business_id']),
-                date=row['date'],
-                override_type=row['override_type'],
-                multiplier=float(row['multiplier']) if row['multiplier'] else None,
-                custom_hours=row['custom_hours'],
-                description=row['description'],
-                is_active=row['is_active'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            ) for row in rows
-        ]
+        body, count, last_date, last_id = await db.fetch_one(query, *params)
+        headers = None
+        if count == pag.limit:
+            headers = {"X-Next-Cursor": encode_cursor(last_date, last_id)}
+        return _cache_put(key, Response(content=body, media_type="application/json", headers=headers))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה בטעינת עקיפות לוח שנה: {str(e)}")
 
-@router.post("/calendar-overrides", response_model=CalendarOverride)
+@router.post("/calendar-overrides", response_model=None, responses={200: {"model": CalendarOverride}})
 async def create_calendar_override(
     override: CalendarOverrideCreate,
     business_id: str = Query(..., description="Business ID")
 ):
     """Create new calendar override"""
     try:
-        override_id = str(uuid.uuid4())
-        now = datetime.utcnow()
-        
+        # id and created_at/updated_at come from the table defaults; Postgres
+        # renders the new row as JSON, which is sent as the response body as-is
         query = """
-            INSERT INTO calendar_overrides (id, business_id, date, override_type, multiplier,
-                                          custom_hours, description, is_active, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-            RETURNING id, business_id, date, override_type, multiplier, custom_hours,
-                     description, is_active, created_at, updated_at
+            WITH r AS (
+                INSERT INTO calendar_overrides (business_id, date, override_type, multiplier,
+                                              custom_hours, description, is_active)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                RETURNING id, business_id, date, override_type, multiplier, custom_hours,
+                         description, is_active, created_at, updated_at
+            )
+            SELECT row_to_json(r)::text FROM r
         """
         
         row = await db.fetch_one(
             query,
-            override_id, business_id, override.date, override.override_type,
+            business_id, override.date, override.override_type,
             override.multiplier, override.custom_hours, override.description,
-            override.is_active, now, now
+            override.is_active
         )
+        _invalidate_calendar(business_id)
         
-        return CalendarOverride(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            date=row['date'],
-            override_type=row['override_type'],
-            multiplier=float(row['multiplier']) if row['multiplier'] else None,
-            custom_hours=row['custom_hours'],
-            description=row['description'],
-            is_active=row['is_active'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
+        return Response(content=row[0], media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה ביצירת עקיפת לוח שנה: {str(e)}")
 
-@router.put("/calendar-overrides/{override_id}", response_model=CalendarOverride)
+@router.post("/calendar-overrides/bulk")
+async def create_calendar_overrides_bulk(
+    overrides: List[CalendarOverrideCreate],
+    business_id: str = Query(..., description="Business ID")
+):
+    """Import many calendar overrides (e.g. a year of holidays) with a single COPY"""
+    try:
+        created = await db.copy_via_staging(
+            CALENDAR_OVERRIDES_STAGING_SQL,
+            'calendar_overrides_import',
+            ('date', 'override_type', 'multiplier', 'custom_hours', 'description', 'is_active'),
+            (
+                (
+                    o.date, o.override_type, o.multiplier,
+                    orjson.dumps(o.custom_hours).decode() if o.custom_hours is not None else None,
+                    o.description, o.is_active
+                )
+                for o in overrides
+            ),
+            CALENDAR_OVERRIDES_MERGE_SQL,
+            business_id
+        )
+        _invalidate_calendar(business_id)
+        
+        return {"created": created}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"שגיאה בייבוא עקיפות לוח שנה: {str(e)}")
+
+@router.put("/calendar-overrides/{override_id}", response_model=None, responses={200: {"model": CalendarOverride}})
 async def update_calendar_override(
     override_id: str,
     override: CalendarOverrideUpdate
 ):
     """Update calendar override"""
     try:
-        # Build dynamic update query
-        update_fields = []
-        values = []
-        param_count = 1
-        
-        if override.date is not None:
-            update_fields.append(f"date = ${param_count}")
-            values.append(override.date)
-            param_count += 1
-            
-        if override.override_type is not None:
-            update_fields.append(f"override_type = ${param_count}")
-            values.append(override.override_type)
-            param_count += 1
-            
-        if override.multiplier is not None:
-            update_fields.append(f"multiplier = ${param_count}")
-            values.append(override.multiplier)
-            param_count += 1
-            
-        if override.custom_hours is not None:
-            update_fields.append(f"custom_hours = ${param_count}")
-            values.append(override.custom_hours)
-            param_count += 1
-            
-        if override.description is not None:
-            update_fields.append(f"description = ${param_count}")
-            values.append(override.description)
-            param_count += 1
-            
-        if override.is_active is not None:
-            update_fields.append(f"is_active = ${param_count}")
-            values.append(override.is_active)
-            param_count += 1
-            
-        if not update_fields:
+        if not override.model_dump(exclude_none=True):
             raise HTTPException(status_code=400, detail="אין שדות לעדכון")
-            
-        update_fields.append(f"updated_at = ${param_count}")
-        values.append(datetime.utcnow())
-        param_count += 1
-        
-        values.append(override_id)  # for WHERE clause
         
-        query = f"""
-            UPDATE calendar_overrides 
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_count}
-            RETURNING id, business_id, date, override_type, multiplier, custom_hours,
-                     description, is_active, created_at, updated_at
-        """
-        
-        row = await db.fetch_one(query, *values)
+        row = await db.fetch_one(
+            CALENDAR_OVERRIDE_UPDATE_SQL,
+            override_id, override.date, override.override_type, override.multiplier,
+            override.custom_hours, override.description, override.is_active
+        )
         if not row:
             raise HTTPException(status_code=404, detail="עקיפת לוח שנה לא נמצאה")
+        _invalidate_calendar(row['business_id'])
             
-        return CalendarOverride(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            date=row['date'],
-            override_type=row['override_type'],
-            multiplier=float(row['multiplier']) if row['multiplier'] else None,
-            custom_hours=row['custom_hours'],
-            description=row['description'],
-            is_active=row['is_active'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
+        return RecordJSONResponse(content=row)
     except HTTPException:
         raise
     except Exception as e:
@@ -447,10 +512,11 @@ async def update_calendar_override(
 async def delete_calendar_override(override_id: str):
     """Delete calendar override"""
     try:
-        query = "DELETE FROM calendar_overrides WHERE id = $1 RETURNING id"
+        query = "DELETE FROM calendar_overrides WHERE id = $1 RETURNING business_id"
         row = await db.fetch_one(query, override_id)
         if not row:
             raise HTTPException(status_code=404, detail="עקיפת לוח שנה לא נמצאה")
+        _invalidate_calendar(row['business_id'])
         return {"message": "עקיפת לוח שנה נמחקה בהצלחה"}
     except HTTPException:
         raise
@@ -458,22 +524,33 @@ async def delete_calendar_override(override_id: str):
         raise HTTPException(status_code=500, detail=f"שגיאה במחיקת עקיפת לוח שנה: {str(e)}")
 
 # Business Events Endpoints  
-@router.get("/business-events", response_model=List[BusinessEvent])
+@router.get("/business-events", response_model=None, responses={200: {"model": List[BusinessEvent]}})
 async def get_business_events(
     business_id: str = Query(..., description="Business ID"),
     start_date: Optional[datetime] = Query(None, description="Start date filter"),
     end_date: Optional[datetime] = Query(None, description="End date filter"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=1000, description="Items per page")
+    pag: PaginationParams = Depends()
 ):
     """Get business events for a business"""
+    if pag.cursor:
+        try:
+            last_start, last_id = decode_cursor(pag.cursor)
+            last_start = datetime.fromisoformat(last_start)
+            last_id = cursor_uuid(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    key = _cache_key("business-events", business_id, start_date, end_date,
+                     pag.limit, pag.offset, pag.cursor)
+    cached = _cache_get(key)
+    if cached:
+        return cached
+    
     try:
-        offset = (page - 1) * page_size
-        
         # Build query with optional date filters
         where_clauses = ["business_id = $1"]
-        params = [business_id]
-        param_count = 2
+        params = [business_id, pag.limit]
+        param_count = 3
         
         if start_date:
             where_clauses.append(f"end_date >= ${param_count}")
@@ -485,179 +562,95 @@ async def get_business_events(
             params.append(end_date)
             param_count += 1
         
-        params.extend([page_size, offset])
+        if pag.cursor:
+            where_clauses.append(
+                f"(start_date, id) < (${param_count}::timestamptz, ${param_count + 1}::uuid)"
+            )
+            params.extend([last_start, last_id])
+            paging = "LIMIT $2"
+        else:
+            params.append(pag.offset)
+            paging = f"LIMIT $2 OFFSET ${param_count}"
         
         query = f"""
-            SELECT id, business_id, name, event_type, start_date, end_date,
-                   expected_impact, description, location, is_recurring,
-                   recurrence_pattern, created_at, updated_at
-            FROM business_events 
-            WHERE {' AND '.join(where_clauses)}
-            ORDER BY start_date DESC
-            LIMIT ${param_count} OFFSET ${param_count + 1}
+            SELECT coalesce(json_agg(t ORDER BY t.start_date DESC, t.id DESC), '[]')::text,
+                   count(*),
+                   (array_agg(t.start_date ORDER BY t.start_date, t.id))[1],
+                   (array_agg(t.id ORDER BY t.start_date, t.id))[1]
+            FROM (
+                SELECT id, business_id, name, event_type, start_date, end_date,
+                       expected_impact, description, location, is_recurring,
+                       recurrence_pattern, created_at, updated_at
+                FROM business_events 
+                WHERE {' AND '.join(where_clauses)}
+                ORDER BY start_date DESC, id DESC
+                {paging}
+            ) t
         """
         
-        rows = await db.fetch_all(query, *params)
-        
-        return [
-            BusinessEvent(
-                id=str(row['id']),
-                business_id=str(row['business_id']),
-                name=row['name'],
-                event_type=row['event_type'],
-                start_date=row['start_date'],
-                end_date=row['end_date'],
-                expected_impact=float(row['expected_impact']) if row['expected_impact'] else None,
-                description=row['description'],
-                location=row['location'],
-                is_recurring=row['is_recurring'],
-                recurrence_pattern=row['recurrence_pattern'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            ) for row in rows
-        ]
+        body, count, last_start, last_id = await db.fetch_one(query, *params)
+        headers = None
+        if count == pag.limit:
+            headers = {"X-Next-Cursor": encode_cursor(last_start, last_id)}
+        return _cache_put(key, Response(content=body, media_type="application/json", headers=headers))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה בטעינת אירועי עסק: {str(e)}")
 
-@router.post("/business-events", response_model=BusinessEvent)
+@router.post("/business-events", response_model=None, responses={200: {"model": BusinessEvent}})
 async def create_business_event(
     event: BusinessEventCreate,
     business_id: str = Query(..., description="Business ID")
 ):
     """Create new business event"""
     try:
-        event_id = str(uuid.uuid4())
-        now = datetime.utcnow()
-        
+        # id and created_at/updated_at come from the table defaults; Postgres
+        # renders the new row as JSON, which is sent as the response body as-is
         query = """
-            INSERT INTO business_events (id, business_id, name, event_type, start_date, end_date,
-                                       expected_impact, description, location, is_recurring,
-                                       recurrence_pattern, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-            RETURNING id, business_id, name, event_type, start_date, end_date,
-                     expected_impact, description, location, is_recurring,
-                     recurrence_pattern, created_at, updated_at
+            WITH r AS (
+                INSERT INTO business_events (business_id, name, event_type, start_date, end_date,
+                                           expected_impact, description, location, is_recurring,
+                                           recurrence_pattern)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                RETURNING id, business_id, name, event_type, start_date, end_date,
+                         expected_impact, description, location, is_recurring,
+                         recurrence_pattern, created_at, updated_at
+            )
+            SELECT row_to_json(r)::text FROM r
         """
         
         row = await db.fetch_one(
             query,
-            event_id, business_id, event.name, event.event_type, event.start_date,
+            business_id, event.name, event.event_type, event.start_date,
             event.end_date, event.expected_impact, event.description, event.location,
-            event.is_recurring, event.recurrence_pattern, now, now
+            event.is_recurring, event.recurrence_pattern
         )
+        _invalidate_calendar(business_id)
         
-        return BusinessEvent(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            name=row['name'],
-            event_type=row['event_type'],
-            start_date=row['start_date'],
-            end_date=row['end_date'],
-            expected_impact=float(row['expected_impact']) if row['expected_impact'] else None,
-            description=row['description'],
-            location=row['location'],
-            is_recurring=row['is_recurring'],
-            recurrence_pattern=row['recurrence_pattern'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
+        return Response(content=row[0], media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה ביצירת אירוע עסק: {str(e)}")
 
-@router.put("/business-events/{event_id}", response_model=BusinessEvent)
+@router.put("/business-events/{event_id}", response_model=None, responses={200: {"model": BusinessEvent}})
 async def update_business_event(
     event_id: str,
     event: BusinessEventUpdate
 ):
     """Update business event"""
     try:
-        # Build dynamic update query
-        update_fields = []
-        values = []
-        param_count = 1
-        
-        if event.name is not None:
-            update_fields.append(f"name = ${param_count}")
-            values.append(event.name)
-            param_count += 1
-            
-        if event.event_type is not None:
-            update_fields.append(f"event_type = ${param_count}")
-            values.append(event.event_type)
-            param_count += 1
-            
-        if event.start_date is not None:
-            update_fields.append(f"start_date = ${param_count}")
-            values.append(event.start_date)
-            param_count += 1
-            
-        if event.end_date is not None:
-            update_fields.append(f"end_date = ${param_count}")
-            values.append(event.end_date)
-            param_count += 1
-            
-        if event.expected_impact is not None:
-            update_fields.append(f"expected_impact = ${param_count}")
-            values.append(event.expected_impact)
-            param_count += 1
-            
-        if event.description is not None:
-            update_fields.append(f"description = ${param_count}")
-            values.append(event.description)
-            param_count += 1
-            
-        if event.location is not None:
-            update_fields.append(f"location = ${param_count}")
-            values.append(event.location)
-            param_count += 1
-            
-        if event.is_recurring is not None:
-            update_fields.append(f"is_recurring = ${param_count}")
-            values.append(event.is_recurring)
-            param_count += 1
-            
-        if event.recurrence_pattern is not None:
-            update_fields.append(f"recurrence_pattern = ${param_count}")
-            values.append(event.recurrence_pattern)
-            param_count += 1
-            
-        if not update_fields:
+        if not event.model_dump(exclude_none=True):
             raise HTTPException(status_code=400, detail="אין שדות לעדכון")
-            
-        update_fields.append(f"updated_at = ${param_count}")
-        values.append(datetime.utcnow())
-        param_count += 1
-        
-        values.append(event_id)  # for WHERE clause
         
-        query = f"""
-            UPDATE business_events 
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_count}
-            RETURNING id, business_id, name, event_type, start_date, end_date,
-                     expected_impact, description, location, is_recurring,
-                     recurrence_pattern, created_at, updated_at
-        """
-        
-        row = await db.fetch_one(query, *values)
+        row = await db.fetch_one(
+            BUSINESS_EVENT_UPDATE_SQL,
+            event_id, event.name, event.event_type, event.start_date, event.end_date,
+            event.expected_impact, event.description, event.location,
+            event.is_recurring, event.recurrence_pattern
+        )
         if not row:
             raise HTTPException(status_code=404, detail="אירוע עסק לא נמצא")
+        _invalidate_calendar(row['business_id'])
             
-        return BusinessEvent(
-            id=str(row['id']),
-            business_id=str(row['business_id']),
-            name=row['name'],
-            event_type=row['event_type'],
-            start_date=row['start_date'],
-            end_date=row['end_date'],
-            expected_impact=float(row['expected_impact']) if row['expected_impact'] else None,
-            description=row['description'],
-            location=row['location'],
-            is_recurring=row['is_recurring'],
-            recurrence_pattern=row['recurrence_pattern'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
+        return RecordJSONResponse(content=row)
     except HTTPException:
         raise
     except Exception as e:
@@ -667,10 +660,11 @@ async def update_business_event(
 async def delete_business_event(event_id: str):
     """Delete business event"""
     try:
-        query = "DELETE FROM business_events WHERE id = $1 RETURNING id"
+        query = "DELETE FROM business_events WHERE id = $1 RETURNING business_id"
         row = await db.fetch_one(query, event_id)
         if not row:
             raise HTTPException(status_code=404, detail="אירוע עסק לא נמצא")
+        _invalidate_calendar(row['business_id'])
         return {"message": "אירוע עסק נמחק בהצלחה"}
     except HTTPException:
         raise
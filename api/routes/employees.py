@@ -7,9 +7,11 @@ API endpoints לניהול עובדים.
 """
 
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel
-from db import db
+from db import db, get_db_slot
+from responses import RecordJSONResponse
 
 router = APIRouter()
 
@@ -26,13 +28,23 @@ class EmployeeCreate(BaseModel):
     email: str
     hourly_rate: float
 
-@router.get("/employees", response_model=List[Employee])
+@router.get("/employees", response_model=None, responses={200: {"model": List[Employee]}},
+            dependencies=[Depends(get_db_slot)])
 async def get_employees(business_id: str = Query(..., description="Business ID to get employees for")):
     """Get employees for a specific business"""
-    try:
-        return await db.get_employees(business_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    # Rows are already JSON-ready (uuid/numeric codecs), skip model re-validation
+    return RecordJSONResponse(content=await db.get_employees(business_id))
+
+@router.get("/employees/stream", dependencies=[Depends(get_db_slot)])
+async def stream_employees(business_id: str = Query(..., description="Business ID to get employees for")):
+    """Stream employees for a business as NDJSON (one JSON object per line)"""
+    if not db.pool:
+        raise HTTPException(status_code=500, detail="Database error: Database connection not available")
+    
+    return StreamingResponse(
+        db.stream_employees(business_id),
+        media_type="application/x-ndjson"
+    )
 
 @router.post("/employees", response_model=Employee)
 async def create_employee(
@@ -40,10 +52,18 @@ async def create_employee(
     business_id: str = Query(..., description="Business ID to create employee for")
 ):
     """Create a new employee for a business"""
-    try:
-        return await db.create_employee(business_id, employee.dict())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return await db.create_employee(
+        business_id, employee.first_name, employee.last_name, employee.email, employee.hourly_rate
+    )
+
+@router.post("/employees/bulk")
+async def create_employees_bulk(
+    employees: List[EmployeeCreate],
+    business_id: str = Query(..., description="Business ID to create employees for")
+):
+    """Create many employees for a business in a single transaction"""
+    created = await db.create_employees_bulk(business_id, employees)
+    return {"created": created}
 
 @router.put("/employees/{employee_id}", response_model=Employee)
 async def update_employee(
@@ -52,10 +72,13 @@ async def update_employee(
     business_id: str = Query(..., description="Business ID for authorization")
 ):
     """Update an employee"""
-    try:
-        return await db.update_employee(employee_id, business_id, employee.dict())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    updated = await db.update_employee(
+        employee_id, business_id,
+        employee.first_name, employee.last_name, employee.email, employee.hourly_rate
+    )
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return updated
 
 @router.delete("/employees/{employee_id}")
 async def delete_employee(
@@ -63,8 +86,6 @@ async def delete_employee(
     business_id: str = Query(..., description="Business ID for authorization")
 ):
     """Delete an employee"""
-    try:
-        await db.delete_employee(employee_id, business_id)
-        return {"message": "Employee deleted successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not await db.delete_employee(employee_id, business_id):
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return {"message": "Employee deleted successfully"}
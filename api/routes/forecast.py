@@ -6,13 +6,15 @@ API endpoints לניהול תחזיות ביקוש.
 מספק ממשקים ליצירה, הצגה ומחיקה של תחזיות.
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Header, Response
 from typing import Dict, Optional, List
 from datetime import datetime
 import re
+import hashlib
 from pydantic import BaseModel
 
-from services.forecast_client import forecast_client
+from services.forecast_client import forecast_client, build_cache_key
+from responses import RecordJSONResponse
 # from dependencies import get_business_id  # TODO: יצירת dependencies
 
 router = APIRouter()
@@ -25,16 +27,16 @@ class ForecastResponse(BaseModel):
     data: Optional[Dict] = None
     error: Optional[Dict] = None
 
+WEEK_RE = re.compile(r'^\d{4}-\d{2}$')
+
 def validate_week_format(week: str) -> bool:
     """בודק פורמט שבוע YYYY-WW"""
-    if not re.match(r'^\d{4}-\d{2}$', week):
+    if not WEEK_RE.match(week):
         return False
     
-    try:
-        year, week_num = map(int, week.split('-'))
-        return 2020 <= year <= 2030 and 1 <= week_num <= 53
-    except ValueError:
-        return False
+    # הביטוי כבר הבטיח ספרות בלבד, כך ש-int לא יכול להיכשל
+    year, week_num = int(week[:4]), int(week[5:])
+    return 2020 <= year <= 2030 and 1 <= week_num <= 53
 
 @router.post("/{week}/generate")
 async def generate_forecast(
@@ -110,12 +112,13 @@ async def generate_forecast(
         else:
             raise HTTPException(status_code=500, detail=result.get("message"))
 
-@router.get("/{week}/details")
+@router.get("/{week}/details", response_model=None, responses={200: {"model": ForecastResponse}})
 async def get_forecast_details(
     week: str,
     business_id: str = Query(..., description="Business UUID"),
-    cache_key: Optional[str] = Query(None, description="מפתח cache ספציפי")
-) -> ForecastResponse:
+    cache_key: Optional[str] = Query(None, description="מפתח cache ספציפי"),
+    if_none_match: Optional[str] = Header(None)
+):
     """
     מחזיר פירוט מלא של תחזית לשבוע
     
@@ -134,10 +137,9 @@ async def get_forecast_details(
             detail=f"פורמט שבוע לא תקין: '{week}'"
         )
     
-    # יצירת cache_key אם לא סופק
+    # יצירת cache_key אם לא סופק (בהנחה של lookback_weeks = 8, ברירת מחדל)
     if not cache_key:
-        # בהנחה של lookback_weeks = 8 (ברירת מחדל)
-        cache_key = f"forecast_{business_id}_{week}_lb8"
+        cache_key = build_cache_key(business_id, week)
     
     success, result = await forecast_client.get_forecast_details(
         cache_key=cache_key,
@@ -145,13 +147,21 @@ async def get_forecast_details(
     )
     
     if success:
-        return ForecastResponse(
-            success=True,
-            data={
+        # ETag מתוכן התגובה: לקוח שכבר מחזיק את אותה תחזית מקבל 304 בלי גוף.
+        # no-cache - הדפדפן מאמת מחדש בכל פעם, כך שתחזית שנוצרה מחדש נראית מיד
+        body = RecordJSONResponse(content={
+            "success": True,
+            "data": {
                 "message": f"פירוט תחזית לשבוע {week}",
                 "forecast_details": result
-            }
-        )
+            },
+            "error": None
+        }).body
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if if_none_match and etag in if_none_match:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
     else:
         error_type = result.get("error", "unknown")
         
@@ -189,7 +199,7 @@ async def delete_forecast(
     
     # יצירת cache_key אם לא סופק
     if not cache_key:
-        cache_key = f"forecast_{business_id}_{week}_lb8"
+        cache_key = build_cache_key(business_id, week)
     
     success, result = await forecast_client.delete_forecast_cache(
         cache_key=cache_key,
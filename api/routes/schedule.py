@@ -1,13 +1,15 @@
 # Copilot: validate inputs; persist draft to schedules + shifts; return alerts.
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Dict, Optional
-from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, date
 import re
 import uuid
+import asyncio
 from pydantic import BaseModel
 
 from services.scheduler import ScheduleGenerator, Employee, AvailabilitySlot, Shift, Alert
 from db import db
+from responses import RecordJSONResponse
 
 router = APIRouter()
 
@@ -42,70 +44,98 @@ class AlertDict(BaseModel):
     message: str
     details: Dict
 
+SCHEDULE_INSERT_SQL = """
+INSERT INTO schedules (id, business_id, name, week_start_date, status, total_hours, total_cost, created_at, updated_at)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+"""
+
+SHIFT_INSERT_SQL = """
+INSERT INTO shifts (id, business_id, schedule_id, employee_id, date, start_time, end_time, 
+                    break_minutes, hourly_rate, status, created_at, updated_at)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+"""
+
+SCHEDULE_BY_WEEK_SQL = """
+SELECT id, name, status, total_cost, total_hours, created_at
+FROM schedules 
+WHERE business_id = $1 AND week_start_date = $2
+ORDER BY created_at DESC
+LIMIT 1
+"""
+
+SCHEDULE_SHIFTS_SQL = """
+SELECT s.id, s.employee_id,
+       e.first_name || ' ' || e.last_name AS employee_name,
+       s.date::text AS date,
+       left(s.start_time::text, 5) AS start_time,
+       left(s.end_time::text, 5) AS end_time,
+       COALESCE(s.break_minutes, 0) AS break_minutes,
+       COALESCE(s.hourly_rate, 0)::float8 AS hourly_rate,
+       COALESCE((EXTRACT(EPOCH FROM (s.end_time - s.start_time)) / 3600.0
+                 - COALESCE(s.break_minutes, 0) / 60.0) * s.hourly_rate, 0)::float8 AS total_cost
+FROM shifts s
+JOIN employees e ON s.employee_id = e.id
+WHERE s.schedule_id = $1
+ORDER BY s.date, s.start_time
+"""
+
+# Employees ('e', by hourly_rate) and available slots ('a', by employee, day,
+# start) of one business in a single round trip; kind is column 1
+SCHEDULING_DATA_SQL = """
+SELECT 'e' AS kind, id, first_name, last_name, hourly_rate,
+       NULL::int AS day_of_week, NULL::time AS start_time, NULL::time AS end_time
+FROM employees
+WHERE business_id = $1 AND hourly_rate IS NOT NULL
+UNION ALL
+SELECT 'a', employee_id, NULL, NULL, NULL,
+       day_of_week, start_time, end_time
+FROM availability
+WHERE business_id = $1 AND is_available = true
+ORDER BY 1, 5, 2, 6, 7
+"""
+
+WEEK_RE = re.compile(r'^(\d{4})-W(\d{1,2})$')
+
 def parse_week_string(week_str: str) -> date:
     """Parse week string like '2025-W43' to Monday date"""
-    match = re.match(r'(\d{4})-W(\d{1,2})', week_str)
+    match = WEEK_RE.match(week_str)
     if not match:
         raise HTTPException(status_code=400, detail="Invalid week format. Use YYYY-WNN (e.g., 2025-W43)")
     
     year, week = int(match.group(1)), int(match.group(2))
     
-    # Get Monday of the specified week
-    jan_1 = date(year, 1, 1)
-    week_1_monday = jan_1 - timedelta(days=jan_1.weekday())
-    target_monday = week_1_monday + timedelta(weeks=week - 1)
-    
-    return target_monday
+    # Monday of the ISO week, the same numbering the AI forecast service uses
+    try:
+        return date.fromisocalendar(year, week, 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid ISO week") from None
 
-async def get_employees_data(business_id: str) -> List[Employee]:
-    """Fetch employees from database"""
-    query = """
-        SELECT id, first_name, last_name, hourly_rate 
-        FROM employees 
-        WHERE business_id = $1 AND hourly_rate IS NOT NULL
-        ORDER BY hourly_rate ASC
-    """
-    rows = await db.fetch_all(query, business_id)
+async def get_scheduling_data(business_id: str) -> Tuple[List[Employee], List[AvailabilitySlot]]:
+    """Fetch the business's paid employees and their available slots in one query"""
+    rows = await db.fetch_all(SCHEDULING_DATA_SQL, business_id)
     
     employees = []
-    for row in rows:
-        employees.append(Employee(
-            id=str(row['id']),
-            first_name=row['first_name'],
-            last_name=row['last_name'],
-            hourly_rate=float(row['hourly_rate']),
-            skills=[]  # Default empty skills for now
-        ))
-    
-    return employees
-
-async def get_availability_data(business_id: str) -> List[AvailabilitySlot]:
-    """Fetch availability from database"""
-    query = """
-        SELECT employee_id, day_of_week, start_time::text, end_time::text, is_available
-        FROM availability 
-        WHERE business_id = $1 AND is_available = true
-        ORDER BY employee_id, day_of_week, start_time
-    """
-    rows = await db.fetch_all(query, business_id)
-    
     availability = []
     for row in rows:
-        from datetime import time
-        
-        # Parse time strings
-        start_time = datetime.strptime(row['start_time'], '%H:%M:%S').time()
-        end_time = datetime.strptime(row['end_time'], '%H:%M:%S').time()
-        
-        availability.append(AvailabilitySlot(
-            employee_id=str(row['employee_id']),
-            day_of_week=row['day_of_week'],
-            start_time=start_time,
-            end_time=end_time,
-            is_available=row['is_available']
-        ))
+        if row[0] == 'e':
+            employees.append(Employee(
+                id=row[1],
+                first_name=row[2],
+                last_name=row[3],
+                hourly_rate=float(row[4]),
+                skills=[]  # Default empty skills for now
+            ))
+        else:
+            # start/end arrive as datetime.time from asyncpg's time codec
+            availability.append(AvailabilitySlot(
+                employee_id=row[1],
+                day_of_week=row[5],
+                start_time=row[6],
+                end_time=row[7],
+                is_available=True
+            ))
     
-    return availability
+    return employees, availability
 
 async def save_schedule_to_db(business_id: str, week_start: date, shifts: List[Shift], 
                             total_cost: float, weekly_budget: float) -> str:
@@ -113,40 +143,37 @@ async def save_schedule_to_db(business_id: str, week_start: date, shifts: List[S
     
     # Create schedule record
     schedule_id = str(uuid.uuid4())
-    total_hours = sum(len(range(int(shift.start_time.hour), int(shift.end_time.hour))) for shift in shifts)
-    
-    schedule_query = """
-        INSERT INTO schedules (id, business_id, name, week_start_date, status, total_hours, total_cost, created_at, updated_at)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-        RETURNING id
-    """
+    # Minute precision; a shift that wraps past midnight counts as 0, as before
+    total_minutes = sum(
+        max((s.end_time.hour * 60 + s.end_time.minute) - (s.start_time.hour * 60 + s.start_time.minute), 0)
+        for s in shifts
+    )
+    total_hours = total_minutes / 60.0
     
     now = datetime.utcnow()
     schedule_name = f"סידור שבוע {week_start.strftime('%d/%m/%Y')}"
     
-    await db.fetch_one(
-        schedule_query,
-        schedule_id, business_id, schedule_name, week_start, 'draft', 
-        total_hours, total_cost, now, now
-    )
-    
-    # Create shift records
-    for shift in shifts:
-        shift_query = """
-            INSERT INTO shifts (id, business_id, schedule_id, employee_id, date, start_time, end_time, 
-                              break_minutes, hourly_rate, status, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-        """
-        await db.fetch_one(
-            shift_query,
-            shift.id, business_id, schedule_id, shift.employee_id, shift.date,
-            shift.start_time, shift.end_time, shift.break_minutes,
-            shift.hourly_rate, 'scheduled', now, now
+    # Schedule and shifts are written atomically on one connection; executemany
+    # pipelines the shift rows instead of waiting a round trip per shift
+    async with db.transaction() as conn:
+        await conn.execute(
+            SCHEDULE_INSERT_SQL,
+            schedule_id, business_id, schedule_name, week_start, 'draft', 
+            total_hours, total_cost, now, now
+        )
+        await conn.executemany(
+            SHIFT_INSERT_SQL,
+            [
+                (shift.id, business_id, schedule_id, shift.employee_id, shift.date,
+                 shift.start_time, shift.end_time, shift.break_minutes,
+                 shift.hourly_rate, 'scheduled', now, now)
+                for shift in shifts
+            ]
         )
     
     return schedule_id
 
-@router.post("/schedule/{week}/generate", response_model=ScheduleResponse)
+@router.post("/schedule/{week}/generate", response_model=None, responses={200: {"model": ScheduleResponse}})
 async def generate_schedule(
     week: str,
     request: ScheduleRequest,
@@ -167,24 +194,23 @@ async def generate_schedule(
         # Parse and validate week
         week_start = parse_week_string(week)
         
-        # Fetch data from database
-        employees = await get_employees_data(business_id)
-        availability = await get_availability_data(business_id)
-        
-        if not employees:
-            raise HTTPException(status_code=400, detail="אין עובדים עם שכר מוגדר בעסק זה")
-        
-        if not availability:
-            raise HTTPException(status_code=400, detail="לא הוגדרה זמינות לעובדים")
-        
         # Initialize scheduler
         generator = ScheduleGenerator(
             weekly_budget=request.weekly_budget,
             min_staff_per_hour=request.min_staff_per_hour
         )
         
-        # Try to load forecast data
-        forecast_loaded = await generator.load_forecast(business_id, week)
+        # Fetch data from database; the forecast lookup overlaps the roster query
+        (employees, availability), forecast_loaded = await asyncio.gather(
+            get_scheduling_data(business_id),
+            generator.load_forecast(business_id, week)
+        )
+        
+        if not employees:
+            raise HTTPException(status_code=400, detail="אין עובדים עם שכר מוגדר בעסק זה")
+        
+        if not availability:
+            raise HTTPException(status_code=400, detail="לא הוגדרה זמינות לעובדים")
         
         if not forecast_loaded:
             # Add alert about missing forecast
@@ -195,8 +221,10 @@ async def generate_schedule(
                 details={"week": week, "fallback_method": "basic_demand_pattern"}
             ))
         
-        # Generate schedule
-        shifts, alerts = generator.generate_schedule(
+        # Generate schedule (pure CPU; run in a worker thread so the event loop
+        # keeps serving other requests meanwhile)
+        shifts, alerts = await asyncio.to_thread(
+            generator.generate_schedule,
             employees=employees,
             availability=availability,
             forecast_data=request.forecast_data
@@ -214,45 +242,47 @@ async def generate_schedule(
         # Prepare response
         employee_dict = {emp.id: f"{emp.first_name} {emp.last_name}" for emp in employees}
         
-        shift_dicts = []
-        for shift in shifts:
-            shift_dicts.append({
-                'id': shift.id,
-                'employee_id': shift.employee_id,
-                'employee_name': employee_dict.get(shift.employee_id, 'לא ידוע'),
-                'date': shift.date.isoformat(),
-                'start_time': shift.start_time.strftime('%H:%M'),
-                'end_time': shift.end_time.strftime('%H:%M'),
-                'break_minutes': shift.break_minutes,
-                'hourly_rate': shift.hourly_rate,
-                'total_cost': shift.total_cost
-            })
-        
-        alert_dicts = []
-        for alert in alerts:
-            alert_dicts.append({
-                'type': alert.type,
-                'severity': alert.severity,
-                'message': alert.message,
-                'details': alert.details
-            })
-        
         budget_utilization = (generator.current_cost / request.weekly_budget) * 100 if request.weekly_budget > 0 else 0
         
-        return ScheduleResponse(
-            schedule_id=schedule_id,
-            week_start=week_start,
-            total_cost=generator.current_cost,
-            budget_utilization=budget_utilization,
-            shifts=shift_dicts,
-            alerts=alert_dicts,
-            status='draft'
-        )
+        # ScheduleResponse-shaped; built from our own generator output, so it is
+        # serialized directly instead of being re-validated by the model
+        return RecordJSONResponse(content={
+            'schedule_id': schedule_id,
+            'week_start': week_start,
+            'total_cost': generator.current_cost,
+            'budget_utilization': budget_utilization,
+            'shifts': [
+                {
+                    'id': shift.id,
+                    'employee_id': shift.employee_id,
+                    'employee_name': employee_dict.get(shift.employee_id, 'לא ידוע'),
+                    'date': shift.date.isoformat(),
+                    'start_time': shift.start_time.strftime('%H:%M'),
+                    'end_time': shift.end_time.strftime('%H:%M'),
+                    'break_minutes': shift.break_minutes,
+                    'hourly_rate': shift.hourly_rate,
+                    'total_cost': shift.total_cost
+                }
+                for shift in shifts
+            ],
+            'alerts': [
+                {
+                    'type': alert.type,
+                    'severity': alert.severity,
+                    'message': alert.message,
+                    'details': alert.details
+                }
+                for alert in alerts
+            ],
+            'status': 'draft'
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"שגיאה ביצירת סידור: {str(e)}")
 
-@router.get("/schedule/{week}", response_model=ScheduleResponse)
+@router.get("/schedule/{week}", response_model=None, responses={200: {"model": ScheduleResponse}})
 async def get_schedule(
     week: str,
     business_id: str = Query(..., description="Business ID")
@@ -262,65 +292,27 @@ async def get_schedule(
         week_start = parse_week_string(week)
         
         # Fetch schedule from database
-        schedule_query = """
-            SELECT id, name, status, total_cost, total_hours, created_at
-            FROM schedules 
-            WHERE business_id = $1 AND week_start_date = $2
-            ORDER BY created_at DESC
-            LIMIT 1
-        """
-        
-        schedule_row = await db.fetch_one(schedule_query, business_id, week_start)
+        schedule_row = await db.fetch_one(SCHEDULE_BY_WEEK_SQL, business_id, week_start)
         if not schedule_row:
             raise HTTPException(status_code=404, detail="לא נמצא סידור לשבוע זה")
         
         schedule_id = str(schedule_row['id'])
         
-        # Fetch shifts
-        shifts_query = """
-            SELECT s.*, e.first_name, e.last_name
-            FROM shifts s
-            JOIN employees e ON s.employee_id = e.id
-            WHERE s.schedule_id = $1
-            ORDER BY s.date, s.start_time
-        """
-        
-        shifts_rows = await db.fetch_all(shifts_query, schedule_id)
-        
-        shift_dicts = []
-        for row in shifts_rows:
-            # Calculate shift cost (since it's not stored directly)
-            start_time = row['start_time']
-            end_time = row['end_time']
-            hours_worked = (datetime.combine(date.today(), end_time) - 
-                          datetime.combine(date.today(), start_time)).total_seconds() / 3600
-            break_minutes = row['break_minutes'] or 0
-            actual_work_hours = hours_worked - (break_minutes / 60)
-            total_cost = actual_work_hours * float(row['hourly_rate']) if row['hourly_rate'] else 0
-            
-            shift_dicts.append({
-                'id': str(row['id']),
-                'employee_id': str(row['employee_id']),
-                'employee_name': f"{row['first_name']} {row['last_name']}",
-                'date': row['date'].isoformat(),
-                'start_time': start_time.strftime('%H:%M'),
-                'end_time': end_time.strftime('%H:%M'),
-                'break_minutes': break_minutes,
-                'hourly_rate': float(row['hourly_rate']) if row['hourly_rate'] else 0,
-                'total_cost': total_cost
-            })
+        # Shifts come back response-shaped; the cost isn't stored, so Postgres
+        # computes it from the shift span, break and rate
+        shifts_rows = await db.fetch_all(SCHEDULE_SHIFTS_SQL, schedule_id)
         
         budget_utilization = 0  # Will be calculated from actual shifts if needed
         
-        return ScheduleResponse(
-            schedule_id=schedule_id,
-            week_start=week_start,
-            total_cost=float(schedule_row['total_cost']),
-            budget_utilization=budget_utilization,
-            shifts=shift_dicts,
-            alerts=[],  # Could fetch alerts from a separate table if needed
-            status=schedule_row['status']
-        )
+        return RecordJSONResponse(content={
+            'schedule_id': schedule_id,
+            'week_start': week_start,
+            'total_cost': float(schedule_row['total_cost']),
+            'budget_utilization': budget_utilization,
+            'shifts': shifts_rows,
+            'alerts': [],  # Could fetch alerts from a separate table if needed
+            'status': schedule_row['status']
+        })
         
     except HTTPException:
         raise
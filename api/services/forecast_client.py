@@ -7,14 +7,35 @@ Forecast Client Module
 """
 
 import httpx
+import orjson
 import logging
 import os
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 import asyncio
+from time import monotonic
 
 logger = logging.getLogger(__name__)
 
+# פירוט תחזית שהתקבל בהצלחה נשמר בזיכרון לפי (business_id, cache_key) למשך
+# FORECAST_DETAILS_CACHE_TTL שניות; generate/delete לאותו מפתח מבטלים אותו
+FORECAST_DETAILS_CACHE_TTL = float(os.getenv("FORECAST_DETAILS_CACHE_TTL", "300"))
+FORECAST_DETAILS_CACHE_MAX_ENTRIES = 1024
+
+# שירות AI שומר את שורות התחזית ב-background task, כלומר רק אחרי שתשובת
+# generate נשלחה. פירוט שנקרא בזמן generate או עד כמה שניות אחריו עלול להיות
+# הישן, ולכן מוחזר לקורא אבל לא נשמר ב-cache
+FORECAST_GENERATE_SETTLE_SECONDS = float(os.getenv("FORECAST_GENERATE_SETTLE_SECONDS", "5"))
+
+# בדיקת בריאות: תקציב זמן לכל שלב, כך שחיבור תקוע נכשל תוך פחות משנייה
+# (במקום 5 שניות) ו-/generate מחזיר 503 מהר; ניסיון חוזר אחד לשגיאות תעבורה
+HEALTH_PROBE_TIMEOUT = httpx.Timeout(connect=0.3, read=1.0, write=0.5, pool=0.2)
+HEALTH_PROBE_ATTEMPTS = 2
+
+def build_cache_key(business_id: str, week: str, lookback_weeks: int = 8) -> str:
+    """מפתח cache של תחזית - זהה ל-generate_cache_key בשירות AI"""
+    return f"forecast_{business_id}_{week}_lb{lookback_weeks}"
+
 class ForecastClient:
     """קליינט לשירות תחזיות AI"""
     
@@ -23,7 +44,53 @@ class ForecastClient:
             ai_service_url = os.getenv("AI_SERVICE_URL", "http://localhost:8085")
         self.ai_service_url = ai_service_url.rstrip('/')
         self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        # תוצאת בדיקת הבריאות האחרונה: (זמן monotonic, תקין?) - נשמרת 5 שניות
+        # כשהשירות תקין ושנייה אחת כשלא, כדי שכל generate לא ישלם probe נוסף
+        self._health_cache: Optional[Tuple[float, bool]] = None
+        self._health_ttl_ok = 5.0
+        self._health_ttl_fail = 1.0
+        self._health_lock = asyncio.Lock()
+        self._details_cache: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+        self._details_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._details_version = 0
+        # (business_id, cache_key) -> זמן monotonic שעד אליו לא שומרים פירוט (generate בדרך או טרי)
+        self._details_unsettled: Dict[Tuple[str, str], float] = {}
+        self._generate_inflight: Dict[str, asyncio.Future] = {}
+    
+    async def startup(self):
+        """פותח את ה-AsyncClient המשותף (connection pool עם keep-alive לשירות AI)"""
+        self._client = httpx.AsyncClient(
+            base_url=self.ai_service_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=128)
+        )
+    
+    async def shutdown(self):
+        """סוגר את ה-AsyncClient המשותף"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         
+    @staticmethod
+    async def _single_flight(inflight: Dict, key, factory):
+        """
+        קוראים מקבילים עם אותו מפתח ממתינים ל-factory() אחד.
+        ה-task המשותף מוגן ב-shield, כך שביטול של קורא אחד לא מבטל לכולם.
+        """
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            inflight[key] = task
+            
+            def _done(t):
+                # invalidate may already have replaced this entry with a newer call
+                if inflight.get(key) is t:
+                    del inflight[key]
+            
+            task.add_done_callback(_done)
+        return await asyncio.shield(task)
+    
     async def generate_forecast(
         self, 
         business_id: str, 
@@ -44,29 +111,49 @@ class ForecastClient:
             - result: תוצאה או שגיאה
         """
         
-        url = f"{self.ai_service_url}/forecast/generate"
+        # בקשות generate מקבילות לאותה תחזית חולקות קריאה אחת לשירות AI
+        return await self._single_flight(
+            self._generate_inflight,
+            build_cache_key(business_id, week, lookback_weeks),
+            lambda: self._request_generate(business_id, week, lookback_weeks)
+        )
+    
+    async def _request_generate(self, business_id: str, week: str, lookback_weeks: int) -> Tuple[bool, Dict]:
+        url = "/forecast/generate"
         payload = {
             "business_id": business_id,
             "week": week,
             "lookback_weeks": lookback_weeks
         }
+        details_key = (business_id, build_cache_key(business_id, week, lookback_weeks))
+        self._details_unsettled[details_key] = float("inf")
         
+        try:
+            return await self._post_generate(url, payload, business_id, week, lookback_weeks)
+        finally:
+            self._details_unsettled[details_key] = monotonic() + FORECAST_GENERATE_SETTLE_SECONDS
+    
+    async def _post_generate(self, url: str, payload: Dict, business_id: str, week: str,
+                             lookback_weeks: int) -> Tuple[bool, Dict]:
         try:
             logger.info(f"קורא לשירות AI ליצירת תחזית: {business_id}, שבוע {week}")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url, json=payload)
+            response = await self._client.post(url, json=payload)
                 
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 logger.info(
                     f"תחזית נוצרה בהצלחה: {result.get('total_forecasts', 0)} רשומות, "
                     f"ביטחון ממוצע: {result.get('average_confidence', 0):.3f}"
                 )
+                self.invalidate_forecast_details(
+                    result.get('cache_key') or build_cache_key(business_id, week, lookback_weeks),
+                    business_id
+                )
                 return True, result
                 
-            elif response.status_code == 400:
-                error_detail = response.json().get('detail', 'שגיאת קלט')
+            elif response.status_code in (400, 422):
+                error_detail = orjson.loads(response.content).get('detail', 'שגיאת קלט')
                 logger.warning(f"שגיאת קלט ביצירת תחזית: {error_detail}")
                 return False, {
                     "error": "invalid_input", 
@@ -74,7 +161,7 @@ class ForecastClient:
                 }
                 
             elif response.status_code == 500:
-                error_detail = response.json().get('detail', 'שגיאה פנימית')
+                error_detail = orjson.loads(response.content).get('detail', 'שגיאה פנימית')
                 logger.error(f"שגיאה פנימית בשירות AI: {error_detail}")
                 return False, {
                     "error": "internal_error",
@@ -109,6 +196,13 @@ class ForecastClient:
                 "message": f"שגיאה לא צפויה: {str(e)}"
             }
     
+    def invalidate_forecast_details(self, cache_key: str, business_id: str):
+        """מבטל פירוט שמור (וקריאה שבדרך) אחרי יצירה או מחיקה של התחזית"""
+        key = (business_id, cache_key)
+        self._details_version += 1
+        self._details_cache.pop(key, None)
+        self._details_inflight.pop(key, None)
+    
     async def get_forecast_details(
         self, 
         cache_key: str, 
@@ -125,17 +219,52 @@ class ForecastClient:
             (success, result): תוצאה או שגיאה
         """
         
-        url = f"{self.ai_service_url}/forecast/details/{cache_key}"
+        key = (business_id, cache_key)
+        entry = self._details_cache.get(key)
+        if entry and entry[0] > monotonic():
+            return True, entry[1]
+        
+        # בקשות מקבילות לאותו מפתח חולקות קריאה אחת לשירות AI (single-flight)
+        return await self._single_flight(
+            self._details_inflight, key,
+            lambda: self._fetch_forecast_details(cache_key, business_id)
+        )
+    
+    async def _fetch_forecast_details(self, cache_key: str, business_id: str) -> Tuple[bool, Dict]:
+        """קריאה בפועל לשירות AI; תוצאה מוצלחת נשמרת אם לא בוטלה בינתיים"""
+        
+        key = (business_id, cache_key)
+        version = self._details_version
+        success, result = await self._request_forecast_details(cache_key, business_id)
+        if success and version == self._details_version and not self._is_unsettled(key):
+            if len(self._details_cache) >= FORECAST_DETAILS_CACHE_MAX_ENTRIES:
+                self._details_cache.clear()
+            self._details_cache[key] = (
+                monotonic() + FORECAST_DETAILS_CACHE_TTL, result
+            )
+        return success, result
+    
+    def _is_unsettled(self, key: Tuple[str, str]) -> bool:
+        """האם generate לאותו מפתח בדרך או הסתיים לפני פחות מ-FORECAST_GENERATE_SETTLE_SECONDS"""
+        deadline = self._details_unsettled.get(key)
+        if deadline is None:
+            return False
+        if deadline > monotonic():
+            return True
+        del self._details_unsettled[key]
+        return False
+    
+    async def _request_forecast_details(self, cache_key: str, business_id: str) -> Tuple[bool, Dict]:
+        url = f"/forecast/details/{cache_key}"
         params = {"business_id": business_id}
         
         try:
             logger.info(f"מביא פירוט תחזית: {cache_key}")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url, params=params)
+            response = await self._client.get(url, params=params)
                 
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 forecast_count = len(result.get('forecasts', []))
                 logger.info(f"פירוט תחזית התקבל: {forecast_count} רשומות")
                 return True, result
@@ -177,17 +306,17 @@ class ForecastClient:
             (success, result): תוצאה או שגיאה
         """
         
-        url = f"{self.ai_service_url}/forecast/cache/{cache_key}"
+        url = f"/forecast/cache/{cache_key}"
         params = {"business_id": business_id}
         
         try:
             logger.info(f"מוחק תחזית מ-cache: {cache_key}")
+            self.invalidate_forecast_details(cache_key, business_id)
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.delete(url, params=params)
+            response = await self._client.delete(url, params=params)
                 
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 logger.info(f"תחזית נמחקה: {result.get('message', 'נמחק')}")
                 return True, result
                 
@@ -212,25 +341,51 @@ class ForecastClient:
                 "message": f"שגיאה במחיקה: {str(e)}"
             }
     
+    def _cached_health(self) -> Optional[bool]:
+        if self._health_cache is None:
+            return None
+        checked_at, ok = self._health_cache
+        ttl = self._health_ttl_ok if ok else self._health_ttl_fail
+        return ok if monotonic() - checked_at < ttl else None
+    
     async def check_health(self) -> bool:
-        """בדיקת בריאות שירות AI"""
+        """בדיקת בריאות שירות AI (תוצאה אחרונה נשמרת ל-TTL קצר)"""
         
-        try:
-            url = f"{self.ai_service_url}/health"
-            
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get(url)
+        ok = self._cached_health()
+        if ok is not None:
+            return ok
+        
+        # בקשות מקבילות ממתינות ל-probe אחד במקום לשלוח כל אחת משלה
+        async with self._health_lock:
+            ok = self._cached_health()
+            if ok is None:
+                ok = await self._probe_health()
+                self._health_cache = (monotonic(), ok)
+            return ok
+    
+    async def _probe_health(self) -> bool:
+        """GET /health לשירות AI; שגיאת תעבורה מנוסה פעם נוספת לפני שמכריזים שהשירות לא זמין"""
+        
+        for attempt in range(HEALTH_PROBE_ATTEMPTS):
+            try:
+                response = await self._client.get("/health", timeout=HEALTH_PROBE_TIMEOUT)
                 
-            if response.status_code == 200:
-                logger.info("שירות AI פעיל ותקין")
-                return True
-            else:
-                logger.warning(f"שירות AI החזיר סטטוס {response.status_code}")
-                return False
+                if response.status_code == 200:
+                    logger.info("שירות AI פעיל ותקין")
+                    return True
+                else:
+                    logger.warning(f"שירות AI החזיר סטטוס {response.status_code}")
+                    return False
                 
-        except Exception as e:
-            logger.error(f"שירות AI לא זמין: {e}")
-            return False
+            except httpx.TransportError as e:
+                if attempt == HEALTH_PROBE_ATTEMPTS - 1:
+                    logger.error(f"שירות AI לא זמין: {e}")
+                    
+            except Exception as e:
+                logger.error(f"שירות AI לא זמין: {e}")
+                return False
+        
+        return False
 
 
 # יצירת instance גלובלי
@@ -2,9 +2,12 @@
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime, time, timedelta, date
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import count, groupby
+from operator import itemgetter
 import uuid
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Employee:
     id: str
     first_name: str
@@ -12,7 +15,7 @@ class Employee:
     hourly_rate: float
     skills: List[str]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AvailabilitySlot:
     employee_id: str
     day_of_week: int  # 0=Sunday, 6=Saturday
@@ -20,7 +23,7 @@ class AvailabilitySlot:
     end_time: time
     is_available: bool
 
-@dataclass
+@dataclass(slots=True)
 class Shift:
     id: str
     employee_id: str
@@ -38,6 +41,56 @@ class Alert:
     message: str
     details: Dict
 
+FORECAST_CACHE_SQL = """
+SELECT forecast_date, hour_of_day, forecasted_demand, confidence_score
+FROM forecast_cache
+WHERE business_id = $1 AND cache_key = $2 AND expires_at > NOW()
+ORDER BY forecast_date, hour_of_day
+"""
+
+# Peak hours: 12-14, 18-21 need 2 staff, others need 1
+_PEAK_HOURS = frozenset((12, 13, 14, 18, 19, 20, 21))
+
+# forecast_data keys ("day_{day}_hour_{hour}"), indexed [day][hour]
+_DEMAND_KEYS = tuple(tuple(f"day_{day}_hour_{hour}" for hour in range(24)) for day in range(7))
+
+# time(h, 0) for every hour, shared by the availability masks
+_HOUR_TIMES = tuple(time(hour, 0) for hour in range(24))
+_FULL_DAY_MASK = (1 << 24) - 1
+
+
+def _slot_to_mask(slot: AvailabilitySlot) -> int:
+    """24-bit mask of the hours (bit h = HH:00) inside the slot, both ends inclusive"""
+    # First whole hour at or after start_time (24 if none)
+    first_hour = slot.start_time.hour
+    if slot.start_time != _HOUR_TIMES[first_hour]:
+        first_hour += 1
+    from_start = _FULL_DAY_MASK ^ ((1 << first_hour) - 1)
+    until_end = (1 << (slot.end_time.hour + 1)) - 1
+    
+    if slot.start_time <= slot.end_time:
+        # Normal shift (same day)
+        return from_start & until_end
+    # Overnight shift (crosses midnight)
+    return from_start | until_end
+
+
+@lru_cache(maxsize=32)
+def _weekday(target_date: str) -> int:
+    """Weekday of a YYYY-MM-DD date; a week's worth of dates is looked up 24 times each"""
+    return datetime.strptime(target_date, "%Y-%m-%d").weekday()
+
+
+def _shift_ids():
+    """
+    Shift ids for one generation run: a single uuid4 with its low 48 bits (node)
+    XORed with a counter, so every id is still a valid, unique version-4 UUID
+    """
+    run_id = uuid.uuid4()
+    prefix = str(run_id)[:24]
+    for seq in count():
+        yield f"{prefix}{run_id.node ^ seq:012x}"
+
 class ScheduleGenerator:
     """Greedy schedule generator with budget constraints"""
     
@@ -47,23 +100,21 @@ class ScheduleGenerator:
         self.current_cost = 0.0
         self.alerts = []
         self.forecast_cache = {}  # Cache for loaded forecasts
+        self._date_index = {}  # "YYYY-MM-DD" -> hour map inside forecast_cache
         
     def demand_to_staff(self, hour: int, day: int, forecast_data: Optional[Dict] = None) -> int:
         """
         Convert demand forecast to required staff count
         Simple logic: peak hours need more staff
         """
-        # Peak hours: 12-14, 18-21 need 2 staff, others need 1
-        peak_hours = list(range(12, 15)) + list(range(18, 22))
-        
         if forecast_data:
             # Use forecast data if available
-            demand_key = f"day_{day}_hour_{hour}"
+            demand_key = _DEMAND_KEYS[day][hour]
             if demand_key in forecast_data:
                 return max(1, int(forecast_data[demand_key] / 10))  # Simple conversion
                 
         # Default demand pattern
-        if hour in peak_hours:
+        if hour in _PEAK_HOURS:
             return max(2, self.min_staff_per_hour)
         elif 6 <= hour <= 23:  # Business hours
             return max(1, self.min_staff_per_hour)
@@ -82,21 +133,13 @@ class ScheduleGenerator:
             bool: האם הטעינה הצליחה
         """
         from db import db  # Import here to avoid circular imports
+        from services.forecast_client import build_cache_key
         
-        cache_key = f"forecast_{business_id}_{week}_lb8"
+        cache_key = build_cache_key(business_id, week)
         
         try:
-            # שאילתא לטעינת תחזיות מה-cache
-            query = """
-            SELECT forecast_date, hour_of_day, forecasted_demand, confidence_score
-            FROM forecast_cache
-            WHERE business_id = %s AND cache_key = %s AND expires_at > NOW()
-            ORDER BY forecast_date, hour_of_day
-            """
-            
-            cursor = db.cursor()
-            cursor.execute(query, (business_id, cache_key))
-            results = cursor.fetchall()
+            # טעינת תחזיות מה-cache (asyncpg, לא חוסם את ה-event loop)
+            results = await db.fetch_all(FORECAST_CACHE_SQL, business_id, cache_key)
             
             if not results:
                 self.alerts.append(Alert(
@@ -107,23 +150,25 @@ class ScheduleGenerator:
                 ))
                 return False
             
-            # המרת תוצאות לפורמט נוח
-            self.forecast_cache[week] = {}
+            # המרת תוצאות לפורמט נוח (השורות ממוינות לפי תאריך)
+            week_forecast = self.forecast_cache[week] = {}
+            confidence_sum = 0.0
             
-            for row in results:
-                forecast_date, hour_of_day, forecasted_demand, confidence_score = row
+            for forecast_date, day_rows in groupby(results, key=itemgetter(0)):
                 day_key = forecast_date.strftime("%Y-%m-%d")
+                day_forecast = week_forecast.setdefault(day_key, {})
+                self._date_index[day_key] = day_forecast
                 
-                if day_key not in self.forecast_cache[week]:
-                    self.forecast_cache[week][day_key] = {}
-                
-                self.forecast_cache[week][day_key][hour_of_day] = {
-                    "demand": float(forecasted_demand),
-                    "confidence": float(confidence_score)
-                }
+                for _, hour_of_day, forecasted_demand, confidence_score in day_rows:
+                    confidence = float(confidence_score)
+                    confidence_sum += confidence
+                    day_forecast[hour_of_day] = {
+                        "demand": float(forecasted_demand),
+                        "confidence": confidence
+                    }
             
             forecast_count = len(results)
-            avg_confidence = sum(float(row[3]) for row in results) / forecast_count if results else 0
+            avg_confidence = confidence_sum / forecast_count
             
             self.alerts.append(Alert(
                 type="forecast_loaded",
@@ -172,14 +217,10 @@ class ScheduleGenerator:
             default_settings.update(settings)
         
         # חיפוש תחזית בcache
-        week = None
-        for cached_week, week_data in self.forecast_cache.items():
-            if target_date in week_data:
-                week = cached_week
-                break
+        day_forecast = self._date_index.get(target_date)
         
-        if week and target_date in self.forecast_cache[week]:
-            hour_data = self.forecast_cache[week][target_date].get(hour)
+        if day_forecast is not None:
+            hour_data = day_forecast.get(hour)
             
             if hour_data:
                 demand = hour_data["demand"]
@@ -207,57 +248,78 @@ class ScheduleGenerator:
                     ))
         
         # Fallback: שימוש בלוגיקה הקודמת
-        return self.demand_to_staff(hour, datetime.strptime(target_date, "%Y-%m-%d").weekday(), None)
+        return self.demand_to_staff(hour, _weekday(target_date), None)
     
-    def pick_employees_greedy(self, 
-                            available_employees: List[Employee],
-                            availability_slots: List[AvailabilitySlot],
-                            required_count: int,
-                            target_day: int,
-                            target_hour: int) -> List[Employee]:
+    @staticmethod
+    def index_availability(availability: List[AvailabilitySlot]) -> Dict[Tuple[str, int], int]:
         """
-        Greedy employee selection: prefer lower cost, respect availability
+        (employee_id, day_of_week) -> 24-bit mask of the hours (bit h = HH:00) covered
+        by the employee's first available slot that day, in list order; only that
+        slot is consulted when picking employees
         """
-        suitable_employees = []
+        index = {}
+        for slot in availability:
+            key = (slot.employee_id, slot.day_of_week)
+            if not slot.is_available or key in index:
+                continue
+            index[key] = _slot_to_mask(slot)
+        return index
+    
+    def pick_employees_greedy(self,
+                            employees_by_rate: List[Employee],
+                            availability_index: Dict[Tuple[str, int], int],
+                            required: List[List[int]]) -> Dict[str, List[int]]:
+        """
+        Greedy employee selection: prefer lower cost, respect availability.
+        employees_by_rate must already be sorted by hourly_rate (cheapest first);
+        required[day][hour] is the staff needed for each hour of the week.
         
-        for emp in available_employees:
-            # Check if employee is available at this time
-            for slot in availability_slots:
-                if (slot.employee_id == emp.id and 
-                    slot.day_of_week == target_day and
-                    slot.is_available):
-                    
-                    # Check if target hour falls within availability window
-                    target_time = time(target_hour, 0)
-                    
-                    # Handle overnight shifts
-                    if slot.start_time <= slot.end_time:
-                        # Normal shift (same day)
-                        if slot.start_time <= target_time <= slot.end_time:
-                            suitable_employees.append((emp, emp.hourly_rate))
-                    else:
-                        # Overnight shift (crosses midnight)
-                        if target_time >= slot.start_time or target_time <= slot.end_time:
-                            suitable_employees.append((emp, emp.hourly_rate))
-                    break
+        Each employee, cheapest first, takes every still-open hour they are available
+        for, so each hour ends up with its required_count cheapest available employees.
+        Returns employee_id -> 7 masks (Sunday to Saturday) of the hours assigned.
+        """
+        remaining = [list(day_required) for day_required in required]
+        # Bit h of open_hours[day] is set while that hour still needs staff;
+        # closed hours (0 required) never get a bit and are never visited
+        open_hours = [0] * 7
+        for day in range(7):
+            for hour, required_count in enumerate(remaining[day]):
+                if required_count > 0:
+                    open_hours[day] |= 1 << hour
         
-        # Sort by hourly rate (greedy: cheapest first)
-        suitable_employees.sort(key=lambda x: x[1])
+        assignments = {}
+        for emp in employees_by_rate:
+            day_masks = assignments.setdefault(emp.id, [0] * 7)
+            for day in range(7):
+                candidates = availability_index.get((emp.id, day), 0) & open_hours[day]
+                day_masks[day] |= candidates
+                while candidates:
+                    bit = candidates & -candidates
+                    candidates ^= bit
+                    hour = bit.bit_length() - 1
+                    remaining[day][hour] -= 1
+                    if not remaining[day][hour]:
+                        open_hours[day] ^= bit
         
-        # Return required count, or all available if not enough
-        selected_count = min(required_count, len(suitable_employees))
-        if selected_count < required_count:
-            self.alerts.append(Alert(
-                type='insufficient_staff',
-                severity='warning',
-                message=f'רק {selected_count} עובדים זמינים מתוך {required_count} נדרשים',
-                details={'day': target_day, 'hour': target_hour, 'available': selected_count, 'required': required_count}
-            ))
+        # Hours left short: required count, or all available if not enough
+        for day in range(7):
+            if not open_hours[day]:
+                continue
+            for hour in range(24):
+                if remaining[day][hour] > 0:
+                    required_count = required[day][hour]
+                    selected_count = required_count - remaining[day][hour]
+                    self.alerts.append(Alert(
+                        type='insufficient_staff',
+                        severity='warning',
+                        message=f'רק {selected_count} עובדים זמינים מתוך {required_count} נדרשים',
+                        details={'day': day, 'hour': hour, 'available': selected_count, 'required': required_count}
+                    ))
         
-        return [emp for emp, rate in suitable_employees[:selected_count]]
+        return assignments
     
     def merge_hours_to_shifts(self, 
-                            employee_assignments: Dict[str, List[Tuple[int, int]]], # employee_id -> [(day, hour), ...]
+                            employee_assignments: Dict[str, List[int]], # employee_id -> 7 day masks of assigned hours
                             employees: List[Employee]) -> List[Shift]:
         """
         Merge contiguous hours into shifts, allow overnight shifts
@@ -265,63 +327,41 @@ class ScheduleGenerator:
         shifts = []
         employee_dict = {emp.id: emp for emp in employees}
         
-        for emp_id, hours in employee_assignments.items():
-            if not hours:
-                continue
-                
+        for emp_id, day_masks in employee_assignments.items():
             employee = employee_dict.get(emp_id)
             if not employee:
                 continue
-                
-            # Group hours by day
-            hours_by_day = {}
-            for day, hour in hours:
-                if day not in hours_by_day:
-                    hours_by_day[day] = []
-                hours_by_day[day].append(hour)
             
-            # Process each day
-            for day, day_hours in hours_by_day.items():
-                day_hours.sort()
-                
+            # Process each day; set bits come out in ascending hour order
+            for day, mask in enumerate(day_masks):
                 # Create longer continuous shifts by filling gaps up to 3 hours
-                if not day_hours:
-                    continue
+                start_hour = end_hour = None
+                while mask:
+                    bit = mask & -mask
+                    mask ^= bit
+                    hour = bit.bit_length() - 1
                     
-                # Sort hours and create continuous ranges
-                day_hours.sort()
-                continuous_ranges = []
-                current_range = [day_hours[0]]
-                
-                for hour in day_hours[1:]:
-                    # If gap is 3 hours or less, extend current range
-                    if hour <= current_range[-1] + 4:  # Allow gaps up to 3 hours
+                    if start_hour is None:
+                        start_hour = end_hour = hour
+                    elif hour <= end_hour + 4:  # Allow gaps up to 3 hours
                         # Fill in the gap
-                        for fill_hour in range(current_range[-1] + 1, hour + 1):
-                            if fill_hour not in current_range:
-                                current_range.append(fill_hour)
+                        end_hour = hour
                     else:
                         # Gap too large, start new range
-                        continuous_ranges.append(current_range)
-                        current_range = [hour]
+                        shifts.append(self._create_shift(emp_id, day, start_hour, end_hour, employee))
+                        start_hour = end_hour = hour
                 
                 # Add final range
-                if current_range:
-                    continuous_ranges.append(current_range)
-                
-                # Create shifts from continuous ranges
-                for hours_range in continuous_ranges:
-                    if len(hours_range) >= 1:  # Minimum shift length
-                        shift = self._create_shift(emp_id, day, hours_range[0], hours_range, employee)
-                        shifts.append(shift)
+                if start_hour is not None:
+                    shifts.append(self._create_shift(emp_id, day, start_hour, end_hour, employee))
         
         return shifts
     
-    def _create_shift(self, emp_id: str, day: int, start_hour: int, hours: List[int], employee: Employee) -> Shift:
-        """Create a shift from list of hours"""
-        shift_date = self._get_date_for_day(day)
+    def _create_shift(self, emp_id: str, day: int, start_hour: int, last_hour: int, employee: Employee) -> Shift:
+        """Create a shift covering start_hour..last_hour (inclusive)"""
+        shift_date = self._week_dates[day]
         start_time = time(start_hour, 0)
-        end_hour = hours[-1] + 1  # End of last hour
+        end_hour = last_hour + 1  # End of last hour
         
         # Handle overnight shifts
         if end_hour >= 24:
@@ -330,7 +370,7 @@ class ScheduleGenerator:
             end_time = time(end_hour, 0)
         
         # Calculate shift details
-        total_hours = len(hours)
+        total_hours = last_hour - start_hour + 1
         break_minutes = max(0, (total_hours - 4) * 15)  # 15min break per 4+ hours
         work_minutes = total_hours * 60 - break_minutes
         total_cost = (work_minutes / 60) * employee.hourly_rate
@@ -348,7 +388,7 @@ class ScheduleGenerator:
         self.current_cost += total_cost
         
         return Shift(
-            id=str(uuid.uuid4()),
+            id=next(self._shift_ids),
             employee_id=emp_id,
             date=shift_date,
             start_time=start_time,
@@ -358,12 +398,12 @@ class ScheduleGenerator:
             total_cost=total_cost
         )
     
-    def _get_date_for_day(self, day_of_week: int) -> date:
-        """Convert day of week to actual date (for current week)"""
+    def _get_week_dates(self) -> List[date]:
+        """Actual dates of the current week, indexed by day of week (0=Sunday)"""
         today = date.today()
         days_since_sunday = (today.weekday() + 1) % 7  # Convert to Sunday=0
         sunday = today - timedelta(days=days_since_sunday)
-        return sunday + timedelta(days=day_of_week)
+        return [sunday + timedelta(days=day_of_week) for day_of_week in range(7)]
     
     def generate_schedule(self,
                          employees: List[Employee],
@@ -375,24 +415,25 @@ class ScheduleGenerator:
         """
         self.current_cost = 0.0
         self.alerts = []
-        employee_assignments = {emp.id: [] for emp in employees}
+        self._week_dates = self._get_week_dates()
+        self._shift_ids = _shift_ids()
+        availability_index = self.index_availability(availability)
+        # Greedy: cheapest first; sorted once (stable) instead of per hour
+        employees_by_rate = sorted(employees, key=lambda emp: emp.hourly_rate)
         
-        # Generate schedule for each day and hour
-        for day in range(7):  # Sunday to Saturday
-            for hour in range(24):
-                required_staff = self.demand_to_staff(hour, day, forecast_data)
-                
-                if required_staff == 0:
-                    continue  # Skip closed hours
-                
-                # Get available employees for this slot
-                selected_employees = self.pick_employees_greedy(
-                    employees, availability, required_staff, day, hour
-                )
-                
-                # Assign employees to this hour
-                for emp in selected_employees:
-                    employee_assignments[emp.id].append((day, hour))
+        # Required staff for each day (Sunday to Saturday) and hour; 0 = closed
+        if forecast_data:
+            required = [
+                [self.demand_to_staff(hour, day, forecast_data) for hour in range(24)]
+                for day in range(7)
+            ]
+        else:
+            # The default pattern is the same every day (rows are only read)
+            required = [[self.demand_to_staff(hour, 0) for hour in range(24)]] * 7
+        
+        assigned = self.pick_employees_greedy(employees_by_rate, availability_index, required)
+        # Shifts are built in the caller's employee order
+        employee_assignments = {emp.id: assigned[emp.id] for emp in employees}
         
         # Convert hour assignments to shifts
         shifts = self.merge_hours_to_shifts(employee_assignments, employees)
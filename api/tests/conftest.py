@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The API imports its modules relative to api/ (e.g. "from services.forecast_client import ...")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import orjson
+
+from services import forecast_client as fc
+
+BUSINESS_ID = "11111111-1111-1111-1111-111111111111"
+WEEK = "2025-W43"
+CACHE_KEY = fc.build_cache_key(BUSINESS_ID, WEEK)
+
+
+class FakeAIService:
+    """AI service whose forecast_cache rows are only replaced when save() runs, like its background task"""
+
+    def __init__(self):
+        self.rows = "old"
+        self.details_calls = 0
+
+    def save(self):
+        self.rows = "new"
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/forecast/generate":
+            # Responds before the rows are written
+            return httpx.Response(200, content=orjson.dumps({"cache_key": CACHE_KEY, "total_forecasts": 168}))
+        if request.url.path == f"/forecast/details/{CACHE_KEY}":
+            self.details_calls += 1
+            return httpx.Response(200, content=orjson.dumps({"forecasts": [], "rows": self.rows}))
+        return httpx.Response(404, content=b"{}")
+
+
+def make_client(service: FakeAIService) -> fc.ForecastClient:
+    client = fc.ForecastClient(ai_service_url="http://ai")
+    client._client = httpx.AsyncClient(base_url="http://ai", transport=httpx.MockTransport(service.handler))
+    return client
+
+
+async def details(client: fc.ForecastClient) -> str:
+    success, result = await client.get_forecast_details(CACHE_KEY, BUSINESS_ID)
+    assert success
+    return result["rows"]
+
+
+def test_details_read_before_late_write_is_not_cached():
+    async def scenario():
+        service = FakeAIService()
+        client = make_client(service)
+
+        assert await details(client) == "old"  # cached before the regenerate
+
+        success, _ = await client.generate_forecast(BUSINESS_ID, WEEK)
+        assert success
+
+        # Read right after generate, before the AI's background write lands
+        assert await details(client) == "old"
+
+        service.save()
+        assert await details(client) == "new"
+        assert await details(client) == "new"
+        await client.shutdown()
+        return service.details_calls
+
+    # Within the settle window every read goes to the AI service
+    assert asyncio.run(scenario()) == 4
+
+
+def test_details_cached_again_after_settle_window(monkeypatch):
+    monkeypatch.setattr(fc, "FORECAST_GENERATE_SETTLE_SECONDS", 0.0)
+
+    async def scenario():
+        service = FakeAIService()
+        client = make_client(service)
+
+        await client.generate_forecast(BUSINESS_ID, WEEK)
+        service.save()
+        assert await details(client) == "new"
+        assert await details(client) == "new"
+        await client.shutdown()
+        return service.details_calls
+
+    assert asyncio.run(scenario()) == 1
@@ -6,6 +6,7 @@ import { Modal } from './ui/Modal';
 import { FormField } from './FormField';
 import { useToast } from './Toast';
 import { useNavigate } from 'react-router-dom';
+import { toIsoWeekString } from '../utils/week';
 
 const scheduleSchema = z.object({
   week_date: z.string().min(1, 'תאריך השבוע חובה'),
@@ -59,19 +60,6 @@ export function ScheduleCreator({ isOpen, onClose, businessId }: ScheduleCreator
     return nextSunday.toISOString().split('T')[0];
   }
 
-  function formatWeekString(dateStr: string): string {
-    const date = new Date(dateStr);
-    const year = date.getFullYear();
-    const weekNumber = getWeekNumber(date);
-    return `${year}-W${weekNumber.toString().padStart(2, '0')}`;
-  }
-
-  function getWeekNumber(date: Date): number {
-    const firstDayOfYear = new Date(date.getFullYear(), 0, 1);
-    const pastDaysOfYear = (date.getTime() - firstDayOfYear.getTime()) / 86400000;
-    return Math.ceil((pastDaysOfYear + firstDayOfYear.getDay() + 1) / 7);
-  }
-
   function formatDate(dateStr: string): string {
     const date = new Date(dateStr);
     const endDate = new Date(date);
@@ -84,7 +72,7 @@ export function ScheduleCreator({ isOpen, onClose, businessId }: ScheduleCreator
     setLoading(true);
     try {
       // יצירת סידור באמצעות API
-      const weekString = formatWeekString(data.week_date);
+      const weekString = toIsoWeekString(new Date(`${data.week_date}T00:00:00`));
       
       const response = await fetch(`${import.meta.env.VITE_API_URL || 'http://localhost:8084'}/api/schedule/${weekString}/generate?business_id=${businessId}`, {
         method: 'POST',
@@ -2,6 +2,7 @@
 import { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { useToast } from '../components/Toast';
+import { toIsoWeekString } from '../utils/week';
 
 interface Shift {
   id: string;
@@ -51,18 +52,9 @@ export function Schedule() {
 
   // Initialize current week
   useEffect(() => {
-    const now = new Date();
-    const year = now.getFullYear();
-    const week = getWeekNumber(now);
-    setCurrentWeek(`${year}-W${week.toString().padStart(2, '0')}`);
+    setCurrentWeek(toIsoWeekString(new Date()));
   }, []);
 
-  function getWeekNumber(date: Date): number {
-    const firstDayOfYear = new Date(date.getFullYear(), 0, 1);
-    const pastDaysOfYear = (date.getTime() - firstDayOfYear.getTime()) / 86400000;
-    return Math.ceil((pastDaysOfYear + firstDayOfYear.getDay() + 1) / 7);
-  }
-
   const generateSchedule = async () => {
     if (!businessId || !currentWeek) {
       showError('אין מזהה עסק או שבוע נבחר');
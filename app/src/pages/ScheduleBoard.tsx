@@ -1,6 +1,7 @@
 import { useState, useRef, useCallback, useEffect } from 'react';
 import { useToast } from '../components/Toast';
 import { useAuth } from '../contexts/AuthContext';
+import { toIsoWeekString } from '../utils/week';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8084';
 
@@ -49,11 +50,8 @@ function ScheduleBoard() {
       if (!businessId) return;
       
       try {
-        // Get current week in YYYY-WNN format
-        const now = new Date();
-        const year = now.getFullYear();
-        const week = getCurrentWeek();
-        const weekString = `${year}-W${week.toString().padStart(2, '0')}`;
+        // Get current week in YYYY-WNN format (ISO week numbering)
+        const weekString = toIsoWeekString(new Date());
         
         const response = await fetch(`${API_BASE_URL}/api/schedule/${weekString}?business_id=${businessId}`);
         if (response.ok) {
@@ -71,16 +69,6 @@ function ScheduleBoard() {
     
     loadScheduleId();
   }, [businessId]);
-  
-  // Helper function to get current week number
-  const getCurrentWeek = () => {
-    const now = new Date();
-    const startOfYear = new Date(now.getFullYear(), 0, 1);
-    const pastDaysOfYear = (now.getTime() - startOfYear.getTime()) / 86400000;
-    return Math.ceil((pastDaysOfYear + startOfYear.getDay() + 1) / 7);
-  };
-  
-  // const currentWeek = getCurrentWeek(); // Not used currently
 
   const [employees] = useState<Employee[]>([
     {
@@ -0,0 +1,20 @@
+// Week strings sent to the API ("YYYY-WNN") use ISO-8601 numbering, the same
+// numbering the backend (date.fromisocalendar) and the AI forecast service use.
+
+/**
+ * ISO week string of the Sunday-to-Saturday week containing `date`.
+ * The week is identified by its Monday, so a Sunday maps to the ISO week that
+ * starts the next day. Near New Year the ISO year can differ from the
+ * calendar year (e.g. 2027-01-01 falls in 2026-W53).
+ */
+export function toIsoWeekString(date: Date): string {
+  const monday = new Date(date.getFullYear(), date.getMonth(), date.getDate() - date.getDay() + 1);
+  // The Thursday of an ISO week decides its year; week 1 holds the year's first Thursday
+  const thursday = new Date(monday.getFullYear(), monday.getMonth(), monday.getDate() + 3);
+  const isoYear = thursday.getFullYear();
+  const dayOfYear = Math.round(
+    (Date.UTC(isoYear, thursday.getMonth(), thursday.getDate()) - Date.UTC(isoYear, 0, 1)) / 86400000
+  );
+  const week = Math.floor(dayOfYear / 7) + 1;
+  return `${isoYear}-W${week.toString().padStart(2, '0')}`;
+}
@@ -0,0 +1,16 @@
+-- Migration: Covering index for the employee list
+-- Created: 2025-10-22
+-- Description: Let GET /employees (WHERE business_id = $1 ORDER BY first_name, last_name)
+-- be answered by an index-only scan, without a heap fetch or sort.
+-- Verify with: EXPLAIN (ANALYZE, BUFFERS) SELECT id, first_name, last_name, email, hourly_rate
+--              FROM employees WHERE business_id = '...' ORDER BY first_name, last_name;
+
+-- ============================================================================
+-- INDEXES
+-- ============================================================================
+
+-- Not CONCURRENTLY: migrations run inside a transaction. On a large live table,
+-- create it by hand with CREATE INDEX CONCURRENTLY first; IF NOT EXISTS then skips it.
+CREATE INDEX IF NOT EXISTS idx_employees_biz_name
+    ON employees (business_id, first_name, last_name)
+    INCLUDE (id, email, hourly_rate);
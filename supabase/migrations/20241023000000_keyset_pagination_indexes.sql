@@ -0,0 +1,21 @@
+-- Migration: Keyset pagination indexes for availability and budgets
+-- Created: 2025-10-23
+-- Description: Back the cursor pages of GET /availability
+-- (ORDER BY day_of_week, start_time, id) and GET /budgets
+-- (ORDER BY period_start DESC, id DESC) with an index per business, so each
+-- page is an index range scan of page_size rows instead of an OFFSET scan.
+-- Verify with: EXPLAIN (ANALYZE, BUFFERS) SELECT ... FROM availability
+--              WHERE business_id = '...' AND (day_of_week, start_time, id) > (...)
+--              ORDER BY day_of_week, start_time, id LIMIT 100;
+
+-- ============================================================================
+-- INDEXES
+-- ============================================================================
+
+-- Not CONCURRENTLY: migrations run inside a transaction. On a large live table,
+-- create it by hand with CREATE INDEX CONCURRENTLY first; IF NOT EXISTS then skips it.
+CREATE INDEX IF NOT EXISTS idx_availability_biz_dow_start
+    ON availability (business_id, day_of_week, start_time, id);
+
+CREATE INDEX IF NOT EXISTS idx_budgets_biz_period_start
+    ON budgets (business_id, period_start DESC, id DESC);
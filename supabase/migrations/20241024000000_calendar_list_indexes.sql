@@ -0,0 +1,25 @@
+-- Migration: Indexes for the calendar list endpoints
+-- Created: 2025-10-24
+-- Description: Match the per-business ORDER BY of GET /seasonal-profiles
+-- (priority, name, id), GET /calendar-overrides (date DESC, id DESC) and
+-- GET /business-events (start_date DESC, id DESC), so both OFFSET and cursor
+-- pages are ordered index range scans instead of a sort of the whole business.
+-- The date filters (date >= / <=, start_date <=) are range conditions on the
+-- same indexes.
+-- Verify with: EXPLAIN (ANALYZE, BUFFERS) SELECT ... FROM calendar_overrides
+--              WHERE business_id = '...' ORDER BY date DESC, id DESC LIMIT 100;
+
+-- ============================================================================
+-- INDEXES
+-- ============================================================================
+
+-- Not CONCURRENTLY: migrations run inside a transaction. On a large live table,
+-- create it by hand with CREATE INDEX CONCURRENTLY first; IF NOT EXISTS then skips it.
+CREATE INDEX IF NOT EXISTS idx_seasonal_profiles_biz_priority_name
+    ON seasonal_profiles (business_id, priority, name, id);
+
+CREATE INDEX IF NOT EXISTS idx_calendar_overrides_biz_date
+    ON calendar_overrides (business_id, date DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_business_events_biz_start
+    ON business_events (business_id, start_date DESC, id DESC);
@@ -414,7 +414,13 @@ CREATE INDEX IF NOT EXISTS idx_forecast_cache_expires_at ON forecast_cache(expir
 
 -- Composite indexes for common queries
 CREATE INDEX IF NOT EXISTS idx_employees_business_status ON employees(business_id, status);
+CREATE INDEX IF NOT EXISTS idx_employees_biz_name ON employees(business_id, first_name, last_name) INCLUDE (id, email, hourly_rate);
 CREATE INDEX IF NOT EXISTS idx_availability_employee_dow ON availability(employee_id, day_of_week);
+CREATE INDEX IF NOT EXISTS idx_availability_biz_dow_start ON availability(business_id, day_of_week, start_time, id);
+CREATE INDEX IF NOT EXISTS idx_budgets_biz_period_start ON budgets(business_id, period_start DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_seasonal_profiles_biz_priority_name ON seasonal_profiles(business_id, priority, name, id);
+CREATE INDEX IF NOT EXISTS idx_calendar_overrides_biz_date ON calendar_overrides(business_id, date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_business_events_biz_start ON business_events(business_id, start_date DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_demand_history_business_date_type ON demand_history(business_id, date, demand_type);
 CREATE INDEX IF NOT EXISTS idx_shifts_employee_date ON shifts(employee_id, date);
 CREATE INDEX IF NOT EXISTS idx_alerts_business_unread ON alerts(business_id, is_read) WHERE is_read = false;